@@ -1,16 +1,84 @@
+import os
 from pathlib import Path
 
 # Base directories for project structure
 _BASE_DIR = Path(__file__).parent.parent
-_CONTENT_DIR = _BASE_DIR / "content"
+# Markdown sources (overridable, e.g. to build a synthetic benchmark corpus)
+CONTENT_DIR = Path(os.getenv("CONTENT_DIR", str(_BASE_DIR / "content")))
 
 # Content organization (used to render dynamic pages)
-AUTHOR_CONTENT_DIR = _CONTENT_DIR / "author"
+AUTHOR_CONTENT_DIR = CONTENT_DIR / "author"
 AUTHOR_CONTENT_FILE = AUTHOR_CONTENT_DIR / "index.md"
-HOMEPAGE_CONTENT_FILE = _CONTENT_DIR / "homepage.md"
-META_CONTENT_FILE = _CONTENT_DIR / "meta.md"
-POSTS_CONTENT_DIR = _CONTENT_DIR / "posts"
-PROJECTS_CONTENT_DIR = _CONTENT_DIR / "projects"
+HOMEPAGE_CONTENT_FILE = CONTENT_DIR / "homepage.md"
+META_CONTENT_FILE = CONTENT_DIR / "meta.md"
+POSTS_CONTENT_DIR = CONTENT_DIR / "posts"
+PROJECTS_CONTENT_DIR = CONTENT_DIR / "projects"
+
+# Seconds between checks for edits under `content/` (0 disables the watcher)
+CONTENT_WATCH_INTERVAL = float(os.getenv("CONTENT_WATCH_INTERVAL", "0"))
+
+# Persistent cache of rendered markdown bodies (an empty value disables it)
+_BUILD_CACHE_DIR = os.getenv("BUILD_CACHE_DIR", str(_BASE_DIR / ".cache" / "build"))
+BUILD_CACHE_DIR = Path(_BUILD_CACHE_DIR) if _BUILD_CACHE_DIR else None
+
+# Prebuilt content loaded at startup instead of building it in every server
+# worker, written by `cli.build_snapshot` (an empty value disables it)
+_CONTENT_SNAPSHOT_FILE = os.getenv(
+    "CONTENT_SNAPSHOT_FILE", str(_BASE_DIR / ".cache" / "content-snapshot.pickle")
+)
+CONTENT_SNAPSHOT_FILE = Path(_CONTENT_SNAPSHOT_FILE) if _CONTENT_SNAPSHOT_FILE else None
+
+# Processes used to render content items (1 builds serially, 0 uses every core)
+BUILD_WORKERS = int(os.getenv("BUILD_WORKERS", "1"))
+
+# Build only the metadata of posts and projects up front and render each body
+# on its first request (for large corpora)
+LAZY_RENDERING = os.getenv("LAZY_RENDERING", "0") == "1"
+
+# Upper bound (in characters) of the bodies rendered on demand, per format
+RENDER_CACHE_MAX_SIZE = int(os.getenv("RENDER_CACHE_MAX_SIZE", str(64 * 1024 * 1024)))
+
+# Upper bound (in characters) of the highlighted code blocks kept in memory,
+# per format
+HIGHLIGHT_CACHE_MAX_SIZE = int(
+    os.getenv("HIGHLIGHT_CACHE_MAX_SIZE", str(16 * 1024 * 1024))
+)
+
+# Upper bound (in bytes, compressed variants included) of the rendered pages
+PAGE_CACHE_MAX_SIZE = int(os.getenv("PAGE_CACHE_MAX_SIZE", str(256 * 1024 * 1024)))
+
+# `Host` headers (with the port, when not the default one) whose rendered pages
+# are cached, comma-separated. Pages requested with any other host are rendered
+# on every request, so made-up hosts can't fill the page cache
+_PAGE_CACHE_HOSTS = os.getenv(
+    "PAGE_CACHE_HOSTS",
+    "luovkle.com,localhost:4000,127.0.0.1:4000,localhost:8000,127.0.0.1:8000",
+)
+PAGE_CACHE_HOSTS = frozenset(
+    host.strip().casefold() for host in _PAGE_CACHE_HOSTS.split(",") if host.strip()
+)
+
+# JSON report of the build stage timings, written after each content build
+# (an empty value disables it)
+_BUILD_REPORT_FILE = os.getenv("BUILD_REPORT_FILE", "")
+BUILD_REPORT_FILE = Path(_BUILD_REPORT_FILE) if _BUILD_REPORT_FILE else None
+
+# Serve the Prometheus metrics at `/metrics`. Only enable it where the route
+# can't be reached from outside (e.g. behind the reverse proxy). Each server
+# worker keeps its own registry: with `WEB_CONCURRENCY` > 1, a scrape only
+# shows the worker that answered it
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+
+# Entries per page of the post and project lists
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "20"))
+
+# Newest entries listed in the post and project feeds, and whether the entries
+# carry the whole rendered body instead of just the description
+FEED_MAX_ENTRIES = int(os.getenv("FEED_MAX_ENTRIES", "20"))
+FEED_FULL_CONTENT = os.getenv("FEED_FULL_CONTENT", "0") == "1"
+
+# Templates used to render pages
+TEMPLATES_DIR = _BASE_DIR / "app" / "templates"
 
 # Static assets configuration
 STATIC_DIR = _BASE_DIR / "app" / "static"
@@ -22,6 +90,12 @@ IMAGES_DIR = STATIC_DIR / "images"
 HEADERS_DIR = IMAGES_DIR / "headers"
 THUMBNAILS_DIR = IMAGES_DIR / "thumbnails"
 
+# Original -> fingerprinted static paths written by `cli.fingerprint_assets`
+ASSETS_MANIFEST_FILE = STATIC_DIR / "assets.json"
+
+# Intrinsic sizes and resized variants written by `cli.convert_images`
+IMAGES_MANIFEST_FILE = IMAGES_DIR / "manifest.json"
+
 # Directories for ansi images
 ANSI_IMAGES_DIR = _ANSI_DIR / "images"
 ANSI_HEADERS_DIR = ANSI_IMAGES_DIR / "headers"
@@ -1,13 +1,16 @@
 from fastapi import FastAPI, Request, status
-from fastapi.staticfiles import StaticFiles
 
+from app.views.middleware import RequestDurationMiddleware
 from app.views.routes import internal_exception, not_found_exception, router
+from app.views.static import FingerprintedStaticFiles
 
 app = FastAPI(openapi_url=None)
 
 app.include_router(router)
 
-app.mount("/static/", StaticFiles(directory="app/static/"), name="static")
+app.add_middleware(RequestDurationMiddleware)
+
+app.mount("/static/", FingerprintedStaticFiles(directory="app/static/"), name="static")
 
 
 @app.exception_handler(status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -17,4 +20,4 @@ async def internal_exception_handler(request: Request, _: Exception):
 
 @app.exception_handler(status.HTTP_404_NOT_FOUND)
 async def not_found_exception_handler(request: Request, _: Exception):
-    return not_found_exception(request)
+    return await not_found_exception(request)
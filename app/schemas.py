@@ -1,3 +1,4 @@
+from datetime import datetime
 from pathlib import Path
 
 from pydantic import BaseModel, Field, HttpUrl, computed_field, field_serializer
@@ -111,34 +112,24 @@ class TemplateArgs(BaseModel):
     code: bool = False
 
 
-class PublishedContent(MarkdownContent):
-    thumbnail_path: Path
-    cover_image_path: Path
-    reading_time_minutes: int
-    publish_date: str
-    extras: dict | None = None
+class ImageVariant(BaseModel):
+    path: Path
+    width: int
 
     @computed_field
     @property
-    def reading_time(self) -> str:
-        suffix = "min" if self.reading_time_minutes == 1 else "mins"
-        return f"{self.reading_time_minutes} {suffix}"
-
-    @computed_field
-    @property
-    def cover_image(self) -> str:
-        return str(self.cover_image_path)
-
-    @computed_field
-    @property
-    def thumbnail(self) -> str:
-        return str(self.thumbnail_path)
+    def url(self) -> str:
+        return str(self.path)
 
 
 class CoverUrls(BaseModel):
     default: Path
     avif: Path | None = None
     webp: Path | None = None
+    width: int | None = None
+    height: int | None = None
+    avif_variants: list[ImageVariant] = []
+    webp_variants: list[ImageVariant] = []
 
     @computed_field
     @property
@@ -156,6 +147,35 @@ class CoverUrls(BaseModel):
         return str(self.webp) if self.webp else None
 
 
+class PublishedContent(MarkdownContent):
+    thumbnail_path: Path
+    thumbnail_urls: CoverUrls
+    cover_image_path: Path
+    reading_time_minutes: int
+    publish_date: str
+    extras: dict | None = None
+    last_modified: datetime
+    digest: str
+    # Set in lazy mode, where `body` and `extras` are rendered on request.
+    content_context: ContentContext | None = None
+
+    @computed_field
+    @property
+    def reading_time(self) -> str:
+        suffix = "min" if self.reading_time_minutes == 1 else "mins"
+        return f"{self.reading_time_minutes} {suffix}"
+
+    @computed_field
+    @property
+    def cover_image(self) -> str:
+        return str(self.cover_image_path)
+
+    @computed_field
+    @property
+    def thumbnail(self) -> str:
+        return str(self.thumbnail_path)
+
+
 class GenericANSIContent(BaseModel):
     slug: str
     header: str
@@ -163,6 +183,10 @@ class GenericANSIContent(BaseModel):
     publish_date: str
     body: str | None = None
     reading_time_minutes: int
+    last_modified: datetime
+    digest: str
+    # Set in lazy mode, where `body` is rendered on request.
+    content_context: ContentContext | None = None
 
     @computed_field
     @property
@@ -171,9 +195,19 @@ class GenericANSIContent(BaseModel):
         return f"{self.reading_time_minutes} {suffix}"
 
 
-class PostANSIContent(GenericANSIContent): ...
+class EncodedBody(BaseModel):
+    body: bytes
+    headers: dict[str, str]
 
 
-class ProjectANSIContent(GenericANSIContent):
-    repository: str | None = None
-    website: str | None = None
+class PageValidators(BaseModel):
+    digest: str
+    last_modified: datetime
+
+
+class CachedPage(BaseModel):
+    etag: str
+    last_modified: datetime | None = None
+    status_code: int = 200
+    media_type: str = "text/html"
+    variants: dict[str, EncodedBody]
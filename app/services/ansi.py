@@ -1,67 +1,184 @@
-from functools import cache
+import json
+import re
+from dataclasses import replace
+from functools import cache, partial
 from pathlib import Path
+from typing import Any
 
-from rich.console import Console
-from rich.markdown import Markdown
+from rich.console import Console, ConsoleOptions, RenderResult
+from rich.markdown import CodeBlock, Markdown
+from rich.text import Text
 
 from app.config import (
     ANSI_HEADERS_DIR,
     COVER_ANSI_FILENAME_TEMPLATE,
     HEADERS_DIR,
+    LAZY_RENDERING,
     POSTS_CONTENT_DIR,
     PROJECTS_CONTENT_DIR,
+    RENDER_CACHE_MAX_SIZE,
 )
-from app.schemas import (
-    ContentContext,
-    GenericANSIContent,
-    PostANSIContent,
-    ProjectANSIContent,
+from app.schemas import ContentContext, GenericANSIContent
+from app.services.assets import clear_asset_index, get_number_of_covers
+from app.services.build_cache import (
+    cached_build,
+    get_item_dependencies,
+    get_renderer_fingerprint,
+    get_source_fingerprint,
 )
 from app.services.common import (
+    ItemCache,
+    SizedLRUCache,
+    compute_digest,
     estimate_reading_time,
     get_content_context,
     get_content_objects,
     get_cover_number,
     get_creation_date,
+    get_modification_time,
     get_slug,
     load_markdown_content,
     move_image,
 )
-from app.types import ANSIContent
+from app.services.highlight import get_highlight_fingerprint, highlight_ansi
+from app.services.metrics import build_stage
+from app.services.store import ANSIItem
+from app.types import ANSIContent, ColorSystemName, Section
+
+# Columns the bodies are wrapped at
+BODY_WIDTH = 79
 
 
 def get_ansi_header_path(title: str) -> Path:
-    number_of_covers = len(list(HEADERS_DIR.glob("*.png")))
+    number_of_covers = get_number_of_covers(HEADERS_DIR)
     cover_number = get_cover_number(len(title), number_of_covers)
     cover_file = COVER_ANSI_FILENAME_TEMPLATE.format(cover_number)
     return ANSI_HEADERS_DIR / cover_file
 
 
-def render_markdown_to_ansi(md_content: str, width: int = 79) -> str:
+@cache
+def read_ansi_header(header_path: Path) -> str:
+    # Headers are shared between items; read each file once per build.
+    return header_path.read_text(encoding="utf-8")
+
+
+class HighlightedCodeBlock(CodeBlock):
+    """Rich Markdown code block highlighted through the shared highlight cache."""
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+        code = str(self.text).rstrip()
+        yield from highlight_ansi(console, options, code, self.lexer_name, self.theme)
+
+
+class HighlightedMarkdown(Markdown):
+    elements = {
+        **Markdown.elements,
+        "fence": HighlightedCodeBlock,
+        "code_block": HighlightedCodeBlock,
+    }
+
+
+# Opening OSC 8 hyperlink sequence, as written by Rich (`ESC ]8;id=<id>;<url>`).
+LINK_ID_PATTERN = re.compile(r"\x1b\]8;id=([^;\x1b]*);")
+
+
+def normalize_link_ids(document: str) -> str:
+    """Replace the random OSC 8 hyperlink ids of Rich with sequential ones.
+
+    Rich draws a random id for every link style, so the same source would
+    render to different bytes (and digests) in every process. Links that
+    shared an id still share one.
+    """
+    link_ids: dict[str, str] = {}
+
+    def replace(match: re.Match[str]) -> str:
+        link_id = link_ids.setdefault(match[1], str(len(link_ids) + 1))
+        return f"\x1b]8;id={link_id};"
+
+    return LINK_ID_PATTERN.sub(replace, document)
+
+
+def render_markdown_to_ansi(md_content: str, width: int = BODY_WIDTH) -> str:
     console = Console(
         width=width, record=True, force_terminal=True, color_system="truecolor"
     )
     with console.capture() as cap:
-        console.print(Markdown(md_content, code_theme="github-dark"))
-    return cap.get()
+        console.print(HighlightedMarkdown(md_content, code_theme="github-dark"))
+    return normalize_link_ids(cap.get())
+
+
+def downgrade_ansi(document: str, color_system: ColorSystemName) -> str:
+    """Re-encode a truecolor ANSI document with a lower color depth.
+
+    Colors are mapped to the closest ones available in `color_system`, which
+    also makes the escape sequences shorter.
+
+    Args:
+        document: ANSI document rendered in truecolor.
+        color_system: Rich color system (`256`, `standard`), `truecolor`, or
+            `none` to strip every escape sequence.
+
+    Returns:
+        The re-encoded document.
+    """
+    if color_system == "truecolor":
+        return document
+    text = Text.from_ansi(document)
+    if color_system == "none":
+        return text.plain
+    console = Console(force_terminal=True, color_system=color_system)
+    with console.capture() as cap:
+        console.print(text, end="", soft_wrap=True)
+    return normalize_link_ids(cap.get())
+
+
+def _get_body_key_parts(md_content: str, width: int) -> tuple[str, ...]:
+    return (
+        get_renderer_fingerprint("rich", "pygments"),
+        get_source_fingerprint(__file__),
+        get_highlight_fingerprint(),
+        str(width),
+        md_content,
+    )
+
+
+def render_markdown_to_ansi_cached(md_content: str, width: int = BODY_WIDTH) -> str:
+    return cached_build(
+        "ansi",
+        _get_body_key_parts(md_content, width),
+        partial(render_markdown_to_ansi, md_content, width),
+    )
 
 
 def _get_generic_ansi_content(
-    content_context: ContentContext,
+    content_context: ContentContext, lazy: bool = LAZY_RENDERING
 ) -> GenericANSIContent:
     index_path: Path = content_context.index_file
     if not index_path.is_file():
         raise FileNotFoundError(f"index file not found: {index_path!s}")
     # Derive a human-friendly title from the filename or the directory name.
     title = index_path.parent.stem if content_context.is_dir else index_path.stem
+    item = f"{content_context.content_type}/{title}"
     # If the context provides images, copy them into the static images directory.
     if content_context.img_files:
-        move_image(content_context)
+        with build_stage("move_image", item):
+            move_image(content_context)
     # Load markdown content and metadata from the source file
     markdown_content = load_markdown_content(content_context.index_file)
     # Parse markdown only if a body exists; otherwise use safe defaults
-    if markdown_content.body:
-        body = render_markdown_to_ansi(markdown_content.body)
+    body_digests: tuple[str, ...] = ()
+    if lazy:
+        # Rendered on request by `get_ansi_item()`; the digest still covers
+        # everything the body depends on.
+        body = None
+        if markdown_content.body:
+            key_parts = _get_body_key_parts(markdown_content.body, BODY_WIDTH)
+            body_digests = (compute_digest(*key_parts),)
+    elif markdown_content.body:
+        with build_stage("render_markdown_to_ansi", item):
+            body = render_markdown_to_ansi_cached(markdown_content.body)
     else:
         body = None
     # Resolve derived fields and fallbacks
@@ -70,10 +187,9 @@ def _get_generic_ansi_content(
     publish_date = markdown_content.date or get_creation_date(
         content_context.index_file
     )
-    header_path = get_ansi_header_path(title)
-    header = header_path.read_text(encoding="utf-8")
+    header = read_ansi_header(get_ansi_header_path(title))
     # Assemble final payload for the published content model
-    generic_ansi_content_dict = {
+    generic_ansi_content_dict: dict[str, Any] = {
         **markdown_content.model_dump(),
         "slug": slug,
         "header": header,
@@ -82,39 +198,115 @@ def _get_generic_ansi_content(
         "publish_date": publish_date,
         "body": body,
     }
+    # Validators for conditional requests: the source mtime and a digest of the
+    # payload that ends up in the rendered document.
+    source_files = [index_path, *(content_context.img_files or [])]
+    generic_ansi_content_dict["last_modified"] = get_modification_time(*source_files)
+    generic_ansi_content_dict["digest"] = compute_digest(
+        json.dumps(generic_ansi_content_dict, default=str, sort_keys=True),
+        *body_digests,
+    )
+    if lazy:
+        generic_ansi_content_dict["content_context"] = content_context
     return GenericANSIContent(**generic_ansi_content_dict)
 
 
-def _get_post_ansi_content(content_context: ContentContext) -> PostANSIContent:
-    generic_ansi_content = _get_generic_ansi_content(content_context)
-    return PostANSIContent(**generic_ansi_content.model_dump())
+def _build_ansi_item(content_context: ContentContext) -> ANSIItem:
+    content = _get_generic_ansi_content(content_context)
+    return ANSIItem.from_ansi_content(content, get_ansi_header_path(content.title))
 
 
-def _get_project_ansi_content(
-    content_context: ContentContext,
-) -> ProjectANSIContent:
-    generic_ansi_content = _get_generic_ansi_content(content_context)
-    return ProjectANSIContent(**generic_ansi_content.model_dump())
+# Rendered items from previous builds, reused while their sources are unchanged.
+_posts_cache: ItemCache[ANSIItem] = ItemCache("ansi_posts")
+_projects_cache: ItemCache[ANSIItem] = ItemCache("ansi_projects")
 
 
-def get_posts_content() -> dict[str, PostANSIContent]:
-    posts: dict[str, PostANSIContent] = {}
-    for content_obj in get_content_objects(POSTS_CONTENT_DIR):
-        content_context = get_content_context(content_obj)
-        content = _get_post_ansi_content(content_context)
+def get_posts_content() -> dict[str, ANSIItem]:
+    posts: dict[str, ANSIItem] = {}
+    content_contexts = map(get_content_context, get_content_objects(POSTS_CONTENT_DIR))
+    content_items = _posts_cache.build_all(
+        content_contexts, _build_ansi_item, get_item_dependencies()
+    )
+    for content in content_items:
         posts[content.slug] = content
     return posts
 
 
-def get_projects_content() -> dict[str, ProjectANSIContent]:
-    projects: dict[str, ProjectANSIContent] = {}
-    for content_obj in get_content_objects(PROJECTS_CONTENT_DIR):
-        content_context = get_content_context(content_obj)
-        content = _get_project_ansi_content(content_context)
+def get_projects_content() -> dict[str, ANSIItem]:
+    projects: dict[str, ANSIItem] = {}
+    content_contexts = map(
+        get_content_context, get_content_objects(PROJECTS_CONTENT_DIR)
+    )
+    content_items = _projects_cache.build_all(
+        content_contexts, _build_ansi_item, get_item_dependencies()
+    )
+    for content in content_items:
         projects[content.slug] = content
     return projects
 
 
-@cache
+_ansi_content: ANSIContent | None = None
+
+
+def build_ansi_content() -> ANSIContent:
+    """Build a new ANSI snapshot, re-rendering only the changed items."""
+    clear_asset_index()
+    read_ansi_header.cache_clear()
+    with build_stage("ansi_content"):
+        return {"posts": get_posts_content(), "projects": get_projects_content()}
+
+
 def get_ansi_content() -> ANSIContent:
-    return {"posts": get_posts_content(), "projects": get_projects_content()}
+    global _ansi_content
+    if _ansi_content is None:
+        _ansi_content = build_ansi_content()
+    return _ansi_content
+
+
+def set_ansi_content(ansi_content: ANSIContent) -> None:
+    """Atomically replace the snapshot served by `get_ansi_content()`."""
+    global _ansi_content
+    _ansi_content = ansi_content
+
+
+# Bodies (UTF-8) rendered on request in lazy mode, keyed by the digest of their
+# item.
+_bodies: SizedLRUCache[str, bytes | None] = SizedLRUCache(
+    "ansi_bodies", RENDER_CACHE_MAX_SIZE, lambda body: len(body or b"")
+)
+
+
+def _render_body(content_context: ContentContext) -> bytes | None:
+    body = load_markdown_content(content_context.index_file).body
+    if not body:
+        return None
+    return render_markdown_to_ansi_cached(body).encode("utf-8")
+
+
+def get_ansi_item(section: Section, slug: str) -> ANSIItem:
+    """Return a post or project of the current ANSI snapshot with its body.
+
+    See `app.services.html.get_item()` for lazy mode.
+
+    Raises:
+        KeyError: If there's no such item.
+    """
+    item = get_ansi_content()[section][slug]
+    if item.content_context is None:
+        return item
+    encoded_body = _bodies.get_or_build(
+        item.digest, partial(_render_body, item.content_context)
+    )
+    return replace(item, encoded_body=encoded_body)
+
+
+def get_ansi_template_context(item: ANSIItem) -> dict[str, Any]:
+    """Variables of the ANSI document templates for an item."""
+    return {
+        "slug": item.slug,
+        "header": read_ansi_header(item.header_path),
+        "title": item.title,
+        "publish_date": item.publish_date,
+        "reading_time": item.reading_time,
+        "body": item.body,
+    }
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from app.config import (
+    ASSETS_MANIFEST_FILE,
+    COVER_FILENAME_TEMPLATE,
+    HEADERS_DIR,
+    IMAGES_MANIFEST_FILE,
+    STATIC_DIR,
+    STATIC_RELATIVE_DIR,
+    THUMBNAILS_DIR,
+)
+from app.schemas import CoverUrls
+from app.services.common import compute_digest, get_cover_number
+
+ALTERNATIVE_FORMATS = ("avif", "webp")
+
+# Fingerprinted copies are named `<stem>.<12 hex digits><suffix>`.
+FINGERPRINT_SIZE = 6
+FINGERPRINTED_NAME_PATTERN = re.compile(r"\.[0-9a-f]{12}\.[^.]+$")
+# Files in the static directory that are never fingerprinted.
+UNFINGERPRINTED_SUFFIXES = (".gz", ".br", ".zst", ".json")
+
+
+def get_file_fingerprint(file: Path) -> str:
+    """Return a short content hash of `file`."""
+    with file.open("rb") as f:
+        digest = hashlib.file_digest(
+            f, lambda: hashlib.blake2b(digest_size=FINGERPRINT_SIZE)
+        )
+    return digest.hexdigest()
+
+
+def fingerprint_asset(file: Path) -> Path:
+    """Create a copy of `file` named after its content hash, if missing.
+
+    Args:
+        file: Asset to fingerprint.
+
+    Returns:
+        Path of the fingerprinted copy, next to the original.
+    """
+    fingerprinted = file.with_name(
+        f"{file.stem}.{get_file_fingerprint(file)}{file.suffix}"
+    )
+    if not fingerprinted.exists():
+        shutil.copy2(file, fingerprinted)
+    return fingerprinted
+
+
+def is_fingerprinted(file: Path) -> bool:
+    return FINGERPRINTED_NAME_PATTERN.search(file.name) is not None
+
+
+def build_asset_manifest(
+    static_dir: Path = STATIC_DIR, manifest_file: Path = ASSETS_MANIFEST_FILE
+) -> dict[str, str]:
+    """Fingerprint every static asset and write the assets manifest.
+
+    Fingerprinted copies that no longer match any asset are removed.
+
+    Args:
+        static_dir: Root of the static files.
+        manifest_file: Destination `.json` file.
+
+    Returns:
+        Fingerprinted paths keyed by original path, relative to `static_dir`.
+    """
+    manifest: dict[str, str] = {}
+    for file in sorted(static_dir.rglob("*")):
+        if not file.is_file() or is_fingerprinted(file):
+            continue
+        if file.name.endswith(UNFINGERPRINTED_SUFFIXES):
+            continue
+        fingerprinted = fingerprint_asset(file)
+        manifest[file.relative_to(static_dir).as_posix()] = fingerprinted.relative_to(
+            static_dir
+        ).as_posix()
+    current = set(manifest.values())
+    for file in static_dir.rglob("*"):
+        if is_fingerprinted(file):
+            if file.relative_to(static_dir).as_posix() not in current:
+                file.unlink()
+    manifest_file.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+@cache
+def get_asset_manifest() -> dict[str, str]:
+    """Load the assets manifest written by `cli.fingerprint_assets`, if any."""
+    if not ASSETS_MANIFEST_FILE.is_file():
+        return {}
+    return json.loads(ASSETS_MANIFEST_FILE.read_text(encoding="utf-8"))
+
+
+# Static paths already resolved to a fingerprinted copy that exists on disk.
+_resolved_assets: dict[str, str] = {}
+
+
+def get_static_path(path: str) -> str:
+    """Resolve a static path to its fingerprinted name.
+
+    Fingerprinting is enabled by the assets manifest: without it, paths are
+    returned unchanged. Assets published after the build step (e.g. images
+    copied from the content) are fingerprinted on first use.
+
+    Args:
+        path: Path relative to the static directory.
+
+    Returns:
+        The fingerprinted path relative to the static directory.
+    """
+    if path in _resolved_assets:
+        return _resolved_assets[path]
+    manifest = get_asset_manifest()
+    if not manifest:
+        return path
+    fingerprinted = manifest.get(path)
+    if not fingerprinted or not (STATIC_DIR / fingerprinted).is_file():
+        file = STATIC_DIR / path
+        if not file.is_file() or is_fingerprinted(file):
+            return path
+        fingerprinted = fingerprint_asset(file).relative_to(STATIC_DIR).as_posix()
+    _resolved_assets[path] = fingerprinted
+    return fingerprinted
+
+
+@cache
+def get_image_manifest() -> dict[str, Any]:
+    """Load the image manifest written by `cli.convert_images`, if any."""
+    if not IMAGES_MANIFEST_FILE.is_file():
+        return {}
+    return json.loads(IMAGES_MANIFEST_FILE.read_text(encoding="utf-8"))
+
+
+def get_responsive_fields(relative_path: Path) -> dict[str, Any]:
+    """Return the intrinsic size and resized variants of a static image.
+
+    Args:
+        relative_path: Image path relative to the static directory.
+
+    Returns:
+        `CoverUrls` fields (`width`, `height`, `<format>_variants`), or an
+        empty dict when the image isn't in the manifest.
+    """
+    entry = get_image_manifest().get(relative_path.as_posix())
+    if not entry:
+        return {}
+    fields = {"width": entry["width"], "height": entry["height"]}
+    for suffix, variants in entry["variants"].items():
+        if suffix in ALTERNATIVE_FORMATS:
+            fields[f"{suffix}_variants"] = variants
+    return fields
+
+
+@cache
+def get_cover_index(covers_dir: Path) -> dict[int, CoverUrls]:
+    """Map every cover number in `covers_dir` to the URLs of its formats.
+
+    The directory is listed once and later lookups don't touch the filesystem.
+    Call `clear_asset_index()` before a build so added covers are picked up.
+
+    Args:
+        covers_dir: Directory with `cover_NNN.png` files and their alternative
+            formats.
+
+    Returns:
+        Cover URLs keyed by cover number, starting at 1.
+    """
+    file_names = {entry.name for entry in os.scandir(covers_dir) if entry.is_file()}
+    # Only `cover_NNN.png` names count: the directory also holds fingerprinted
+    # copies (`cover_NNN.<hash>.png`) once `cli.fingerprint_assets` has run.
+    number_of_covers = 0
+    while COVER_FILENAME_TEMPLATE.format(number_of_covers + 1) in file_names:
+        number_of_covers += 1
+    index: dict[int, CoverUrls] = {}
+    for cover_number in range(1, number_of_covers + 1):
+        default_path = covers_dir / COVER_FILENAME_TEMPLATE.format(cover_number)
+        relative_path = default_path.relative_to(STATIC_RELATIVE_DIR)
+        cover_urls: dict[str, Any] = {
+            "default": relative_path,
+            **get_responsive_fields(relative_path),
+        }
+        for suffix in ALTERNATIVE_FORMATS:
+            alt_path = default_path.with_suffix(f".{suffix}")
+            if alt_path.name in file_names:
+                cover_urls[suffix] = alt_path.relative_to(STATIC_RELATIVE_DIR)
+        index[cover_number] = CoverUrls(**cover_urls)
+    return index
+
+
+def get_number_of_covers(covers_dir: Path) -> int:
+    return len(get_cover_index(covers_dir))
+
+
+def get_cover_key(covers_dir: Path, title: str) -> int:
+    """Return the number of the cover of `title` in the index of `covers_dir`."""
+    return get_cover_number(len(title), get_number_of_covers(covers_dir))
+
+
+def get_cover_urls(covers_dir: Path, title: str) -> CoverUrls:
+    return get_cover_index(covers_dir)[get_cover_key(covers_dir, title)]
+
+
+@cache
+def get_asset_index_digest() -> str:
+    """Digest the cover indexes and manifests that content items embed.
+
+    Thumbnail URLs, srcsets and fingerprinted paths are baked into the built
+    items, so a change to any of them must invalidate every item.
+    """
+    covers = [
+        {number: urls.model_dump(mode="json") for number, urls in index.items()}
+        for index in (get_cover_index(HEADERS_DIR), get_cover_index(THUMBNAILS_DIR))
+    ]
+    return compute_digest(
+        json.dumps(covers, sort_keys=True),
+        json.dumps(get_image_manifest(), sort_keys=True),
+        json.dumps(get_asset_manifest(), sort_keys=True),
+    )
+
+
+def clear_asset_index() -> None:
+    get_cover_index.cache_clear()
+    get_asset_index_digest.cache_clear()
+    get_image_manifest.cache_clear()
+    get_asset_manifest.cache_clear()
+    _resolved_assets.clear()
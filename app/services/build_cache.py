@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Callable, Iterable
+from functools import cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any
+
+from app.config import BUILD_CACHE_DIR, TEMPLATES_DIR
+from app.services.assets import get_asset_index_digest
+from app.services.common import compute_digest
+from app.services.metrics import count_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def get_renderer_fingerprint(*packages: str) -> str:
+    """Digest the versions of the packages a renderer depends on.
+
+    Args:
+        *packages: Distribution names (e.g. `markdown`, `rich`).
+
+    Returns:
+        str: A digest that changes whenever any of the versions changes.
+    """
+    versions = []
+    for package in packages:
+        try:
+            versions.append(f"{package}=={version(package)}")
+        except PackageNotFoundError:
+            versions.append(f"{package}==unknown")
+    return compute_digest(*versions)
+
+
+@cache
+def get_source_fingerprint(source_file: str) -> str:
+    # Renderer options live in code, so editing the module invalidates entries.
+    return compute_digest(Path(source_file).read_text(encoding="utf-8"))
+
+
+def get_templates_fingerprint() -> str:
+    """Digest the page templates; not memoized so edits are picked up."""
+    sources = [
+        path.read_text(encoding="utf-8")
+        for path in sorted(TEMPLATES_DIR.rglob("*"))
+        if path.is_file()
+    ]
+    return compute_digest(*sources)
+
+
+def get_item_dependencies() -> str:
+    """Digest the inputs shared by every content item.
+
+    Folded into the `ItemCache` signatures so that a changed cover, manifest or
+    template rebuilds every item, not only those whose sources changed.
+    """
+    return compute_digest(get_asset_index_digest(), get_templates_fingerprint())
+
+
+def _get_cache_file(cache_dir: Path, namespace: str, key: str) -> Path:
+    return cache_dir / namespace / key[:2] / f"{key}.json"
+
+
+def _read_entry(cache_file: Path) -> Any | None:
+    try:
+        return json.loads(cache_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable build cache entry: %s", cache_file)
+        return None
+
+
+def _write_entry(cache_file: Path, value: Any) -> None:
+    # Write to a temporary file and rename so readers never see partial data.
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+            json.dump(value, tmp_file)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        logger.warning("Could not write build cache entry: %s", cache_file)
+
+
+def cached_build[T](
+    namespace: str,
+    key_parts: Iterable[str],
+    build: Callable[[], T],
+) -> T:
+    """Return a persisted build result, or run `build` and persist it.
+
+    Entries are content addressed: the key is a digest of `key_parts`, which
+    must cover every input of the build (source text, renderer fingerprints,
+    options). Values must be JSON serializable.
+
+    Args:
+        namespace: Subdirectory of the cache used for this kind of result.
+        key_parts: Inputs identifying the result.
+        build: Callable producing the result on a cache miss.
+
+    Returns:
+        The cached or freshly built result.
+    """
+    cache_dir = BUILD_CACHE_DIR
+    if cache_dir is None:
+        return build()
+    key = compute_digest(*key_parts)
+    cache_file = _get_cache_file(cache_dir, namespace, key)
+    value = _read_entry(cache_file)
+    count_cache_lookup(f"build_{namespace}", value is not None)
+    if value is None:
+        value = build()
+        _write_entry(cache_file, value)
+    return value
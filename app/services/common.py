@@ -1,14 +1,32 @@
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
 import os
 import re
 import shutil
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, date, datetime
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import yaml
 
-from app.config import IMAGES_DIR
+from app.config import BUILD_WORKERS, IMAGES_DIR
 from app.schemas import ContentContext, MarkdownContent
+from app.services.metrics import count_cache_lookup
+
+if TYPE_CHECKING:
+    from app.types import Section
+
+# Format of publish dates, in front matter and derived from file creation times
+DATE_FORMAT = "%d.%m.%Y"
+
+# URL path of the list page of each section
+SECTION_PATHS: dict[Section, str] = {"posts": "p", "projects": "pr"}
 
 
 def get_slug(md_file: Path) -> str:
@@ -25,7 +43,33 @@ def estimate_reading_time(content: str | None = None) -> int:
 
 def get_creation_date(md_file: Path) -> str:
     c_time = os.path.getctime(md_file)
-    return datetime.fromtimestamp(c_time).strftime("%d.%m.%Y")
+    return datetime.fromtimestamp(c_time).strftime(DATE_FORMAT)
+
+
+def parse_date(value: str) -> date | None:
+    try:
+        return datetime.strptime(value.strip(), DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+def get_site_url(metadata: dict[str, Any]) -> str:
+    # Public URL of the site, for the documents that need absolute URLs.
+    return str(metadata["og_url"]).rstrip("/")
+
+
+def get_modification_time(*paths: Path) -> datetime:
+    # Truncated to whole seconds, the resolution of HTTP dates.
+    m_time = max(os.path.getmtime(path) for path in paths)
+    return datetime.fromtimestamp(int(m_time), tz=UTC)
+
+
+def compute_digest(*parts: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
 
 
 def get_cover_number(n: int, max: int) -> int:
@@ -47,9 +91,9 @@ def move_image(
 ) -> list[Path]:
     """Copy image assets from `<dir>/images` into the static images tree.
 
-    If the destination directory already exists and `force_overwrite` is False,
-    the function does not copy anything and returns the expected destination
-    paths based on the source filenames.
+    If the destination directory already exists, is newer than every source
+    image and `force_overwrite` is False, the function does not copy anything
+    and returns the expected destination paths based on the source filenames.
 
     Note:
         The function name says "move", but the operation performed is a copy
@@ -90,10 +134,12 @@ def move_image(
         raise FileNotFoundError(f"No image files found in {images_content_dir}")
     # Destination: /static/images/<content_type>/<dir_name>
     images_static_dir = IMAGES_DIR / content_context.content_type / directory.name
-    # If the destination already exists and overwrite is disabled, skip copying
+    # If the destination is up to date and overwrite is disabled, skip copying
     # and return the expected destination paths.
     if images_static_dir.exists() and not force_overwrite:
-        return [Path(images_static_dir / src.name) for src in image_content_items]
+        dst_m_time = images_static_dir.stat().st_mtime
+        if all(src.stat().st_mtime <= dst_m_time for src in image_content_items):
+            return [Path(images_static_dir / src.name) for src in image_content_items]
     # If the destination exists, remove it to ensure a clean state.
     if images_static_dir.exists():
         if images_static_dir.is_dir():
@@ -207,3 +253,170 @@ def load_generic_markdown_content(md_file: Path) -> dict[str, Any]:
 def load_markdown_content(md_file: Path) -> MarkdownContent:
     generic_markdown_content = load_generic_markdown_content(md_file)
     return MarkdownContent(**generic_markdown_content)
+
+
+def get_source_signature(content_context: ContentContext) -> tuple:
+    """Identify the current version of a content item's source files.
+
+    Args:
+        content_context: Context of the content item.
+
+    Returns:
+        A hashable tuple of (path, mtime in ns, size) for the index file and
+        every image, which changes whenever any of them is edited.
+    """
+    files = [content_context.index_file, *(content_context.img_files or [])]
+    signature = []
+    for file in sorted(files):
+        stat = file.stat()
+        signature.append((str(file), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def map_in_processes[T](
+    func: Callable[[ContentContext], T],
+    content_contexts: list[ContentContext],
+    workers: int = BUILD_WORKERS,
+) -> list[T]:
+    """Apply `func` to every content context, in a process pool when enabled.
+
+    Rendering is CPU bound, so threads would serialize on the GIL. Workers are
+    spawned rather than forked because builds may run from a thread of the
+    server process.
+
+    Args:
+        func: Module-level (picklable) build function.
+        content_contexts: Items to build.
+        workers: Pool size. 1 builds in the current process, 0 uses every core.
+
+    Returns:
+        list[T]: Results in the same order as `content_contexts`.
+    """
+    max_workers = workers or os.cpu_count() or 1
+    max_workers = min(max_workers, len(content_contexts))
+    if max_workers <= 1:
+        return [func(content_context) for content_context in content_contexts]
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers, mp_context=mp_context) as executor:
+        return list(executor.map(func, content_contexts))
+
+
+class ItemCache[T]:
+    """Memoize per-item build results by the signature of their source files.
+
+    Used to rebuild only the content items that changed since the last build.
+    Items that disappear from the content directory are dropped on each build.
+    Lookups are counted in the `cache_requests_total` metric under `name`.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._items: dict[Path, tuple[tuple, T]] = {}
+
+    def build_all(
+        self,
+        content_contexts: Iterable[ContentContext],
+        build: Callable[[ContentContext], T],
+        dependencies: str = "",
+    ) -> list[T]:
+        """Build every item, reusing the results whose signature is unchanged.
+
+        Args:
+            content_contexts: Items to build, in listing order.
+            build: Module-level (picklable) build function.
+            dependencies: Digest of the inputs shared by all items (covers,
+                manifests, templates). A change rebuilds every item.
+
+        Returns:
+            list[T]: Results in the same order as `content_contexts`.
+        """
+        signatures: dict[Path, tuple] = {}
+        results: dict[Path, T] = {}
+        pending: list[ContentContext] = []
+        for content_context in content_contexts:
+            index_file = content_context.index_file
+            signatures[index_file] = (
+                dependencies,
+                get_source_signature(content_context),
+            )
+            cached = self._items.get(index_file)
+            if cached is not None and cached[0] == signatures[index_file]:
+                count_cache_lookup(self.name, hit=True)
+                results[index_file] = cached[1]
+            else:
+                count_cache_lookup(self.name, hit=False)
+                pending.append(content_context)
+        built = map_in_processes(build, pending)
+        for content_context, result in zip(pending, built, strict=True):
+            results[content_context.index_file] = result
+        self._items = {path: (signatures[path], results[path]) for path in signatures}
+        # Keep the directory listing order.
+        return [results[path] for path in signatures]
+
+
+class SizedLRUCache[K, V]:
+    """Least recently used cache bounded by the total size of its values.
+
+    Entries are evicted, least recently used first, once the summed sizes
+    exceed `max_size`; values larger than `max_size` are never stored. Lookups
+    are counted in the `cache_requests_total` metric under `name`.
+    """
+
+    def __init__(self, name: str, max_size: int, get_size: Callable[[V], int]) -> None:
+        self.name = name
+        self.max_size = max_size
+        self._get_size = get_size
+        self._entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _lookup(self, key: K) -> tuple[V, int] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        count_cache_lookup(self.name, entry is not None)
+        return entry
+
+    def get(self, key: K) -> V | None:
+        entry = self._lookup(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: K, value: V) -> None:
+        size = self._get_size(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            if size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def get_or_build(self, key: K, build: Callable[[], V]) -> V:
+        """Return the cached value of `key`, building and storing it on a miss.
+
+        The build runs outside the lock, so concurrent misses on the same key
+        may build it more than once.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
+        value = build()
+        self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,73 @@
+import gzip
+import sys
+from collections.abc import Callable
+
+import brotli
+
+if sys.version_info >= (3, 14):
+    from compression import zstd
+else:
+    import zstandard as zstd
+
+# Bodies smaller than this are not worth the extra headers and CPU to decode.
+MIN_COMPRESS_SIZE = 512
+
+# Levels per encoding. Pages compressed on their first request use moderate
+# levels, so a cold page doesn't hold a worker thread for long; the static
+# export (`cli.export_site`) is compressed once, with the highest ones.
+REQUEST_LEVELS = {"gzip": 6, "br": 5, "zstd": 3}
+EXPORT_LEVELS = {"gzip": 9, "br": 11, "zstd": 19}
+
+Encoder = Callable[[bytes, int], bytes]
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level)
+
+
+def _zstd(body: bytes, level: int) -> bytes:
+    return zstd.compress(body, level)
+
+
+def get_available_encoders() -> dict[str, Encoder]:
+    """Return the content encoders used for the precompressed variants.
+
+    Zstd comes from `compression.zstd` on Python 3.14+ and from `zstandard`
+    before.
+
+    Returns:
+        dict[str, Encoder]: Encoders, taking a body and a level, keyed by
+            their HTTP `Content-Encoding` token.
+    """
+    return {"gzip": _gzip, "br": _brotli, "zstd": _zstd}
+
+
+def compress_variants(
+    body: bytes, levels: dict[str, int] = REQUEST_LEVELS
+) -> dict[str, bytes]:
+    """Build every compressed variant of a response body.
+
+    Variants that are not smaller than the original body are dropped, so the
+    result may only contain the uncompressed `identity` variant.
+
+    Args:
+        body (bytes): Uncompressed response body.
+        levels (dict[str, int], optional): Level of each encoding. Defaults to
+            `REQUEST_LEVELS`.
+
+    Returns:
+        dict[str, bytes]: Bodies keyed by `Content-Encoding` token, always
+            including `identity`.
+    """
+    variants = {"identity": body}
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+    for encoding, encoder in get_available_encoders().items():
+        compressed = encoder(body, levels[encoding])
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
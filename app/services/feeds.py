@@ -0,0 +1,238 @@
+import json
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import format_datetime
+from typing import Any, TypeIs
+from urllib.parse import urljoin
+from xml.etree import ElementTree
+
+from bs4 import BeautifulSoup
+
+from app.config import FEED_FULL_CONTENT, FEED_MAX_ENTRIES
+from app.services.common import SECTION_PATHS, get_site_url
+from app.services.store import ContentItem, GeneratedFile
+from app.types import FeedFormat, Section
+
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+JSON_FEED_VERSION = "https://jsonfeed.org/version/1.1"
+
+FEED_MEDIA_TYPES: dict[FeedFormat, str] = {
+    "atom": "application/atom+xml",
+    "rss": "application/rss+xml",
+    "json": "application/feed+json",
+}
+
+
+# Name of each section in the feed titles.
+SECTION_TITLES: dict[Section, str] = {"posts": "Posts", "projects": "Projects"}
+
+
+def is_feed_format(value: str) -> TypeIs[FeedFormat]:
+    return value in FEED_MEDIA_TYPES
+
+
+@dataclass(frozen=True, slots=True)
+class FeedEntry:
+    url: str
+    title: str
+    summary: str | None
+    content: str | None
+    topic: str | None
+    published: datetime
+    updated: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class FeedInfo:
+    title: str
+    description: str
+    author: str
+    language: str
+    home_url: str
+    updated: datetime
+    entries: Sequence[FeedEntry]
+
+    def feed_url(self, feed_format: FeedFormat) -> str:
+        return f"{self.home_url}/feed.{feed_format}"
+
+
+def _absolute_urls(html: str, base_url: str) -> str:
+    # Feed readers resolve relative links against the feed, not the page.
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup.find_all(["a", "img", "source"]):
+        for attribute in ("href", "src"):
+            if tag.get(attribute):
+                tag[attribute] = urljoin(base_url, str(tag[attribute]))
+        if tag.get("srcset"):
+            candidates = (
+                part.strip().split(" ", 1) for part in str(tag["srcset"]).split(",")
+            )
+            tag["srcset"] = ", ".join(
+                " ".join([urljoin(base_url, url), *descriptor])
+                for url, *descriptor in candidates
+            )
+    return str(soup)
+
+
+def _get_entry(
+    item: ContentItem, home_url: str, get_body: Callable[[ContentItem], str | None]
+) -> FeedEntry:
+    url = f"{home_url}/{item.slug}"
+    content = None
+    if FEED_FULL_CONTENT and (body := get_body(item)):
+        content = _absolute_urls(body, url)
+    return FeedEntry(
+        url=url,
+        title=item.title,
+        summary=item.description,
+        content=content,
+        topic=item.topic,
+        published=item.published_at,
+        updated=item.updated_at,
+    )
+
+
+def _add_element(
+    parent: ElementTree.Element, tag: str, text: str | None = None, **attributes: str
+) -> ElementTree.Element:
+    element = ElementTree.SubElement(parent, tag, attributes)
+    element.text = text
+    return element
+
+
+def render_atom(info: FeedInfo) -> bytes:
+    feed = ElementTree.Element(
+        "feed", {"xmlns": ATOM_NAMESPACE, "xml:lang": info.language}
+    )
+    _add_element(feed, "id", info.feed_url("atom"))
+    _add_element(feed, "title", info.title)
+    _add_element(feed, "subtitle", info.description)
+    _add_element(feed, "updated", info.updated.isoformat())
+    _add_element(feed, "link", rel="alternate", href=info.home_url)
+    _add_element(feed, "link", rel="self", href=info.feed_url("atom"))
+    author = _add_element(feed, "author")
+    _add_element(author, "name", info.author)
+    for entry in info.entries:
+        element = _add_element(feed, "entry")
+        _add_element(element, "id", entry.url)
+        _add_element(element, "title", entry.title)
+        _add_element(element, "link", rel="alternate", href=entry.url)
+        _add_element(element, "published", entry.published.isoformat())
+        _add_element(element, "updated", entry.updated.isoformat())
+        if entry.topic:
+            _add_element(element, "category", term=entry.topic)
+        if entry.summary:
+            _add_element(element, "summary", entry.summary)
+        if entry.content:
+            _add_element(element, "content", entry.content, type="html")
+    return ElementTree.tostring(feed, encoding="utf-8", xml_declaration=True)
+
+
+def render_rss(info: FeedInfo) -> bytes:
+    # The Atom namespace is only used for the self link.
+    rss = ElementTree.Element("rss", {"version": "2.0", "xmlns:atom": ATOM_NAMESPACE})
+    channel = _add_element(rss, "channel")
+    _add_element(channel, "title", info.title)
+    _add_element(channel, "link", info.home_url)
+    _add_element(channel, "description", info.description)
+    _add_element(channel, "language", info.language)
+    _add_element(channel, "lastBuildDate", format_datetime(info.updated))
+    _add_element(
+        channel,
+        "atom:link",
+        rel="self",
+        type=FEED_MEDIA_TYPES["rss"],
+        href=info.feed_url("rss"),
+    )
+    for entry in info.entries:
+        item = _add_element(channel, "item")
+        _add_element(item, "title", entry.title)
+        _add_element(item, "link", entry.url)
+        _add_element(item, "guid", entry.url, isPermaLink="true")
+        _add_element(item, "pubDate", format_datetime(entry.published))
+        if entry.topic:
+            _add_element(item, "category", entry.topic)
+        if description := entry.content or entry.summary:
+            _add_element(item, "description", description)
+    return ElementTree.tostring(rss, encoding="utf-8", xml_declaration=True)
+
+
+def render_json_feed(info: FeedInfo) -> bytes:
+    items = []
+    for entry in info.entries:
+        item: dict[str, Any] = {"id": entry.url, "url": entry.url, "title": entry.title}
+        if entry.summary:
+            item["summary"] = entry.summary
+        # Items need a content field: fall back to the summary.
+        if entry.content:
+            item["content_html"] = entry.content
+        else:
+            item["content_text"] = entry.summary or entry.title
+        item["date_published"] = entry.published.isoformat()
+        item["date_modified"] = entry.updated.isoformat()
+        if entry.topic:
+            item["tags"] = [entry.topic]
+        items.append(item)
+    feed = {
+        "version": JSON_FEED_VERSION,
+        "title": info.title,
+        "home_page_url": info.home_url,
+        "feed_url": info.feed_url("json"),
+        "description": info.description,
+        "language": info.language,
+        "authors": [{"name": info.author}],
+        "items": items,
+    }
+    return json.dumps(feed, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+_RENDERERS: dict[FeedFormat, Callable[[FeedInfo], bytes]] = {
+    "atom": render_atom,
+    "rss": render_rss,
+    "json": render_json_feed,
+}
+
+
+def build_feeds(
+    content: dict[str, Any],
+    get_body: Callable[[ContentItem], str | None],
+    max_entries: int = FEED_MAX_ENTRIES,
+) -> dict[Section, dict[FeedFormat, GeneratedFile]]:
+    """Serialize the feeds of the posts and projects in every format.
+
+    Args:
+        content: Content snapshot, with its `listings` and `last_modified`.
+        get_body: Returns the rendered body of an item, used for full-content
+            entries (`FEED_FULL_CONTENT`).
+        max_entries: Newest entries listed in each feed.
+
+    Returns:
+        The feeds of each section, by format.
+    """
+    metadata = content["metadata"]
+    site_url = get_site_url(metadata)
+    language = metadata["language"].split(",")[0].strip()
+    feeds: dict[Section, dict[FeedFormat, GeneratedFile]] = {}
+    for section, path in SECTION_PATHS.items():
+        home_url = f"{site_url}/{path}"
+        slugs = [slug for page in content["listings"][section] for slug in page]
+        items = [content[section][slug] for slug in slugs[:max_entries]]
+        info = FeedInfo(
+            title=f"{metadata['og_title']} - {SECTION_TITLES[section]}",
+            description=content["homepage"][f"{section}_section"]["description"],
+            author=metadata["author"],
+            language=language,
+            home_url=home_url,
+            # Feeds change with the site metadata too.
+            updated=max(
+                [content["last_modified"], *(item.last_modified for item in items)]
+            ),
+            entries=[_get_entry(item, home_url, get_body) for item in items],
+        )
+        feeds[section] = {}
+        for feed_format, render in _RENDERERS.items():
+            feeds[section][feed_format] = GeneratedFile.from_body(
+                render(info), FEED_MEDIA_TYPES[feed_format], info.updated
+            )
+    return feeds
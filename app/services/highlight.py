@@ -0,0 +1,161 @@
+from collections.abc import Callable
+from functools import cache
+from typing import Any
+
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+from rich.console import Console, ConsoleOptions
+from rich.segment import Segment
+from rich.style import Style
+from rich.syntax import Syntax
+
+from app.config import HIGHLIGHT_CACHE_MAX_SIZE
+from app.services.build_cache import (
+    cached_build,
+    get_renderer_fingerprint,
+    get_source_fingerprint,
+)
+from app.services.common import SizedLRUCache, compute_digest
+
+PLAIN_TEXT = "text"
+
+# Highlighted code blocks keyed by the digest of their code, language, output
+# format and rendering options: a block is highlighted once per process for
+# all the items (and rebuilds) it appears in, and once per build cache.
+_html_blocks: SizedLRUCache[str, str] = SizedLRUCache(
+    "highlight_html", HIGHLIGHT_CACHE_MAX_SIZE, lambda block: len(block)
+)
+_ansi_blocks: SizedLRUCache[str, list[Segment]] = SizedLRUCache(
+    "highlight_ansi",
+    HIGHLIGHT_CACHE_MAX_SIZE,
+    lambda segments: sum(len(segment.text) for segment in segments),
+)
+
+
+def get_highlight_fingerprint() -> str:
+    """Digest of the highlighting code, for the caches of the whole bodies."""
+    return get_source_fingerprint(__file__)
+
+
+@cache
+def get_lexer(language: str | None, **options: Any) -> Lexer:
+    """Resolve the lexer of a code block from its language tag.
+
+    Lexers are never guessed from the code: blocks without a tag, or with an
+    unknown one, are plain text.
+
+    Args:
+        language: Language tag of the block (e.g. `python`).
+        **options: Lexer options.
+
+    Returns:
+        A lexer, shared by every block with the same tag and options.
+    """
+    try:
+        return get_lexer_by_name(language or PLAIN_TEXT, **options)
+    except ClassNotFound:
+        return get_lexer_by_name(PLAIN_TEXT, **options)
+
+
+def _highlight_cached[T](
+    blocks: SizedLRUCache[str, T],
+    output_format: str,
+    key_parts: tuple[str, ...],
+    build: Callable[[], Any],
+    decode: Callable[[Any], T],
+) -> T:
+    # `build` returns the JSON value persisted by the build cache.
+    key_parts = (get_highlight_fingerprint(), output_format, *key_parts)
+
+    def load() -> T:
+        return decode(cached_build(f"highlight_{output_format}", key_parts, build))
+
+    return blocks.get_or_build(compute_digest(*key_parts), load)
+
+
+@cache
+def _get_html_formatter(language: str | None) -> HtmlFormatter:
+    # Same markup as the `codehilite` Markdown extension.
+    lang_str = f"language-{language}" if language else None
+    return HtmlFormatter(cssclass="codehilite", wrapcode=True, lang_str=lang_str)
+
+
+def _highlight_html(code: str, language: str | None) -> str:
+    return highlight(code, get_lexer(language), _get_html_formatter(language))
+
+
+def highlight_html(code: str, language: str | None) -> str:
+    """Highlight a code block into HTML, with `codehilite` markup.
+
+    Args:
+        code: Source of the block.
+        language: Language tag of the block, if any.
+
+    Returns:
+        The highlighted block, without trailing newline.
+    """
+    return _highlight_cached(
+        _html_blocks,
+        "html",
+        (get_renderer_fingerprint("pygments"), language or "", code),
+        lambda: _highlight_html(code, language).rstrip("\n"),
+        str,
+    )
+
+
+def _encode_segments(segments: list[Segment]) -> list[list[str | None]]:
+    return [
+        [segment.text, str(segment.style) if segment.style else None]
+        for segment in segments
+    ]
+
+
+def _decode_segments(encoded: list[list[str | None]]) -> list[Segment]:
+    return [
+        Segment(str(text), Style.parse(style) if style else None)
+        for text, style in encoded
+    ]
+
+
+def highlight_ansi(
+    console: Console,
+    options: ConsoleOptions,
+    code: str,
+    language: str | None,
+    theme: str,
+) -> list[Segment]:
+    """Highlight a code block with Rich, like a Rich Markdown code block.
+
+    Args:
+        console: Console the block is rendered in.
+        options: Render options; the block depends on their `max_width`.
+        code: Source of the block.
+        language: Language tag of the block, if any.
+        theme: Pygments style name.
+
+    Returns:
+        The segments of the padded, highlighted block.
+    """
+
+    def build() -> list[list[str | None]]:
+        # The options Rich passes when it resolves lexer names itself.
+        lexer = get_lexer(language, stripnl=False, ensurenl=True, tabsize=4)
+        syntax = Syntax(code, lexer, theme=theme, word_wrap=True, padding=1)
+        return _encode_segments(list(console.render(syntax, options)))
+
+    return _highlight_cached(
+        _ansi_blocks,
+        "ansi",
+        (
+            get_renderer_fingerprint("rich", "pygments"),
+            language or "",
+            theme,
+            str(options.max_width),
+            code,
+        ),
+        build,
+        _decode_segments,
+    )
@@ -1,21 +1,28 @@
-from functools import cache
+import json
+from collections.abc import Iterable
+from dataclasses import replace
+from datetime import date
+from functools import partial
 from pathlib import Path
+from typing import Any
 from urllib.parse import urlsplit
 
 import markdown
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 
 from app.config import (
     AUTHOR_CONTENT_DIR,
     AUTHOR_CONTENT_FILE,
-    COVER_FILENAME_TEMPLATE,
     HEADERS_DIR,
     HOMEPAGE_CONTENT_FILE,
     IMAGES_DIR,
     IMAGES_RELATIVE_DIR,
+    LAZY_RENDERING,
+    LIST_PAGE_SIZE,
     META_CONTENT_FILE,
     POSTS_CONTENT_DIR,
     PROJECTS_CONTENT_DIR,
+    RENDER_CACHE_MAX_SIZE,
     STATIC_PREFIX,
     STATIC_RELATIVE_DIR,
     THUMBNAILS_DIR,
@@ -25,22 +32,45 @@ from app.schemas import (
     ContentContext,
     CoverUrls,
     HomepageMD,
+    MarkdownContent,
     MetadataMD,
     PublishedContent,
     TemplateArgs,
 )
+from app.services.assets import (
+    clear_asset_index,
+    get_cover_key,
+    get_cover_urls,
+    get_responsive_fields,
+    get_static_path,
+)
+from app.services.build_cache import (
+    cached_build,
+    get_item_dependencies,
+    get_renderer_fingerprint,
+    get_source_fingerprint,
+)
 from app.services.common import (
+    ItemCache,
+    SizedLRUCache,
+    compute_digest,
     estimate_reading_time,
     get_content_context,
     get_content_objects,
-    get_cover_number,
     get_creation_date,
+    get_modification_time,
     get_slug,
     load_generic_markdown_content,
     load_markdown_content,
     move_image,
 )
-from app.types import HeadersAndThumbnailsDict
+from app.services.feeds import build_feeds
+from app.services.highlight import get_highlight_fingerprint, highlight_html
+from app.services.metrics import build_stage
+from app.services.search import build_search_index, get_search_document
+from app.services.sitemap import build_robots, build_sitemap
+from app.services.store import ContentItem
+from app.types import HeadersAndThumbnailsDict, Section
 
 
 def get_alternative_file_formats(original_file_path: Path) -> dict[str, Path]:
@@ -57,27 +87,16 @@ def collect_relative_image_urls(
     alternative_paths: dict[str, Path],
 ) -> "CoverUrls":
     cover_paths = {"default": default_path, **alternative_paths}
-    cover_urls: dict[str, Path] = {}
+    cover_urls: dict[str, Any] = {}
     for name, path in cover_paths.items():
         cover_urls[name] = path.relative_to(STATIC_RELATIVE_DIR)
-    return CoverUrls(**cover_urls)
-
-
-def _get_cover_urls(covers_path: Path, title: str) -> "CoverUrls":
-    #
-    number_of_covers = len(list(covers_path.glob("*.png")))
-    cover_number = get_cover_number(len(title), number_of_covers)
-    cover_file = COVER_FILENAME_TEMPLATE.format(cover_number)
-    #
-    default_cover_path = covers_path / cover_file
-    alt_cover_paths = get_alternative_file_formats(default_cover_path)
-    return collect_relative_image_urls(default_cover_path, alt_cover_paths)
+    return CoverUrls(**cover_urls, **get_responsive_fields(cover_urls["default"]))
 
 
 def get_headers_and_thumbnails(title: str) -> HeadersAndThumbnailsDict:
     return {
-        "headers": _get_cover_urls(HEADERS_DIR, title),
-        "thumbnails": _get_cover_urls(THUMBNAILS_DIR, title),
+        "headers": get_cover_urls(HEADERS_DIR, title),
+        "thumbnails": get_cover_urls(THUMBNAILS_DIR, title),
     }
 
 
@@ -120,95 +139,148 @@ def _is_external_url(src: str) -> bool:
     return False
 
 
+# Attributes set on each rendered tag, applied in a single pass over the tree.
+TAG_ATTRIBUTES: dict[str, dict[str, str]] = {
+    "a": {
+        "class": "text-sky-500 font-bold",
+        "target": "_blank",
+        "rel": "noopener noreferrer",
+    },
+    "h1": {"class": "text-4xl font-black"},
+    "h2": {"class": "text-3xl font-black"},
+    "h3": {"class": "text-2xl font-black"},
+    "h4": {"class": "text-xl font-black"},
+    "h5": {"class": "text-xl font-bold"},
+    "h6": {"class": "text-lg font-bold"},
+    "blockquote": {
+        "class": "bg-neutral-900 px-4 py-2 italic rounded-md text-base font-medium"
+    },
+    "ul": {"class": "ps-5 space-y-1 list-disc list-inside"},
+    "ol": {"class": "ps-5 space-y-1 list-decimal list-inside"},
+    "img": {"class": "mx-auto"},
+    "pre": {"class": "py-3 px-3 text-md overflow-x-auto"},
+}
+
+
+def _get_static_image_src(content_context: ContentContext, src: str) -> str | None:
+    # Skip empty sources or external URLs (keep as-is).
+    if not src or _is_external_url(src):
+        return None
+    # Use the directory containing the index file to compute a unique static path.
+    directory = content_context.index_file.parent
+    # Only use the filename part to avoid leaking nested relative paths.
+    src_name = Path(src).name
+    # Destination: /static/images/<content_type>/<dir_name>/<src_name>
+    dest = IMAGES_DIR / content_context.content_type / directory.name / src_name
+    # Generate a path relative to the static root, fingerprinted when enabled.
+    return STATIC_PREFIX + get_static_path(
+        dest.relative_to(STATIC_RELATIVE_DIR).as_posix()
+    )
+
+
+def _get_code_language(code: Tag) -> str | None:
+    # `fenced_code` tags blocks as `language-<name>`; indented blocks have none.
+    for css_class in code.get_attribute_list("class"):
+        if css_class and css_class.startswith("language-"):
+            return css_class.removeprefix("language-")
+    return None
+
+
+def _set_tag_attributes(tag: Tag) -> None:
+    attributes = TAG_ATTRIBUTES.get(tag.name)
+    if attributes:
+        tag.attrs.update(attributes)
+
+
 def _parse_markdown(content_context: ContentContext, body: str) -> dict:
     # Convert Markdown to HTML (no extra extensions enabled here by design).
     html_content = markdown.markdown(
         body,
-        extensions=["fenced_code", "codehilite"],
+        extensions=["fenced_code"],
         output_format="html",
     )
     template_args = {"code": False}
-    # Parse rendered HTML to find and rewrite image sources when they are local.
     soup = BeautifulSoup(html_content, "html.parser")
-    imgs = soup.find_all("img")
-    # Use the directory containing the index file to compute a unique static path.
-    directory = content_context.index_file.parent
-    for img in imgs:
-        img_src_raw = img.get("src")
-        img_src_str = str(img_src_raw)  # Normalize to string for checks.
-        # Skip empty sources or external URLs (keep as-is).
-        if not img_src_raw or _is_external_url(img_src_str):
-            continue
-        # Only use the filename part to avoid leaking nested relative paths.
-        src_name = Path(img_src_str).name
-        # Destination: /static/images/<content_type>/<dir_name>/<src_name>
-        dest = IMAGES_DIR / content_context.content_type / directory.name / src_name
-        # Generate a path relative to the static root to feed url_for().
-        rel = STATIC_PREFIX + str(dest.relative_to(STATIC_RELATIVE_DIR).as_posix())
-        # Inject a Jinja expression that FastAPI will resolve at render time.
-        img["src"] = rel
-    # Check for <code> tags
-    code_blocks = soup.find_all("code")
-    if len(code_blocks) >= 1:
-        template_args["code"] = True
-    # Update <a> tags
-    tags = soup.find_all("a")
-    for tag in tags:
-        tag.attrs["class"] = "text-sky-500 font-bold"
-        tag.attrs["target"] = "_blank"
-        tag.attrs["rel"] = "noopener noreferrer"
-    # Update <h1> tags
-    for tag in soup.find_all("h1"):
-        tag.attrs["class"] = "text-4xl font-black"
-    # Update <h2> tags
-    for tag in soup.find_all("h2"):
-        tag.attrs["class"] = "text-3xl font-black"
-    # Update <h3> tags
-    for tag in soup.find_all("h3"):
-        tag.attrs["class"] = "text-2xl font-black"
-    # Update <h4> tags
-    for tag in soup.find_all("h4"):
-        tag.attrs["class"] = "text-xl font-black"
-    # Update <h5> tags
-    for tag in soup.find_all("h5"):
-        tag.attrs["class"] = "text-xl font-bold"
-    # Update <h6> tags
-    for tag in soup.find_all("h6"):
-        tag.attrs["class"] = "text-lg font-bold"
-    # Update <blockquote> tags
-    for tag in soup.find_all("blockquote"):
-        tag.attrs["class"] = (
-            "bg-neutral-900 px-4 py-2 italic rounded-md text-base font-medium"
-        )
-    # Update <ul> tags
-    for tag in soup.find_all("ul"):
-        tag.attrs["class"] = "ps-5 space-y-1 list-disc list-inside"
-    # Update <li> tags
-    for tag in soup.find_all("ol"):
-        tag.attrs["class"] = "ps-5 space-y-1 list-decimal list-inside"
-    # Update <img> tags
-    for tag in soup.find_all("img"):
-        tag.attrs["class"] = "mx-auto"
-    # Update <pre> tags
-    for tag in soup.find_all("pre"):
-        tag.attrs["class"] = "py-3 px-3 text-md overflow-x-auto"
+    # Walk the rendered tree once: highlight code blocks, rewrite local image
+    # sources, detect code and apply the styling attributes from
+    # `TAG_ATTRIBUTES`.
+    for tag in soup.find_all(True):
+        if tag.name == "code":
+            template_args["code"] = True
+            pre = tag.parent
+            if pre is not None and pre.name == "pre":
+                # Highlight through the shared cache (same markup as the
+                # `codehilite` extension).
+                highlighted = BeautifulSoup(
+                    highlight_html(tag.get_text(), _get_code_language(tag)),
+                    "html.parser",
+                )
+                # The new tags aren't part of this walk; style them here.
+                for highlighted_tag in highlighted.find_all(True):
+                    _set_tag_attributes(highlighted_tag)
+                pre.replace_with(highlighted)
+                continue
+        elif tag.name == "img":
+            src = _get_static_image_src(content_context, str(tag.get("src") or ""))
+            if src:
+                tag["src"] = src
+        _set_tag_attributes(tag)
     return {"content": str(soup), "extras": template_args}
 
 
-def _get_published_content(content_context: ContentContext) -> PublishedContent:
+def _get_body_key_parts(content_context: ContentContext, body: str) -> tuple:
+    # The output also depends on where local images are published, and on
+    # their fingerprinted names.
+    image_srcs = [
+        _get_static_image_src(content_context, file.name)
+        for file in content_context.img_files or []
+    ]
+    return (
+        get_renderer_fingerprint("markdown", "beautifulsoup4", "pygments"),
+        get_source_fingerprint(__file__),
+        get_highlight_fingerprint(),
+        content_context.content_type,
+        content_context.index_file.parent.name,
+        *sorted(filter(None, image_srcs)),
+        body,
+    )
+
+
+def _parse_markdown_cached(content_context: ContentContext, body: str) -> dict:
+    return cached_build(
+        "html",
+        _get_body_key_parts(content_context, body),
+        partial(_parse_markdown, content_context, body),
+    )
+
+
+def _get_published_content(
+    content_context: ContentContext,
+    markdown_content: MarkdownContent,
+    lazy: bool = LAZY_RENDERING,
+) -> PublishedContent:
     index_path: Path = content_context.index_file
-    if not index_path.is_file():
-        raise FileNotFoundError(f"index file not found: {index_path!s}")
     # Derive a human-friendly title from the filename or the directory name.
     title = index_path.parent.stem if content_context.is_dir else index_path.stem
+    item = f"{content_context.content_type}/{title}"
     # If the context provides images, copy them into the static images directory.
     if content_context.img_files:
-        move_image(content_context)
-    # Load markdown content and metadata from the source file
-    markdown_content = load_markdown_content(content_context.index_file)
+        with build_stage("move_image", item):
+            move_image(content_context)
     # Parse markdown only if a body exists; otherwise use safe defaults
-    if markdown_content.body:
-        parsed_markdown = _parse_markdown(content_context, markdown_content.body)
+    body_digests: tuple[str, ...] = ()
+    if lazy:
+        # Rendered on request by `get_item()`; the digest still covers
+        # everything the body depends on.
+        body, extras = None, None
+        if markdown_content.body:
+            key_parts = _get_body_key_parts(content_context, markdown_content.body)
+            body_digests = (compute_digest(*key_parts),)
+    elif markdown_content.body:
+        with build_stage("parse_markdown", item):
+            parsed_markdown = _parse_markdown_cached(
+                content_context, markdown_content.body
+            )
         body, extras = parsed_markdown["content"], parsed_markdown["extras"]
     else:
         body, extras = None, TemplateArgs().model_dump()
@@ -222,7 +294,7 @@ def _get_published_content(content_context: ContentContext) -> PublishedContent:
         content_context.index_file
     )
     # Assemble final payload for the published content model
-    published_content_dict = {
+    published_content_dict: dict[str, Any] = {
         **markdown_content.model_dump(),
         "title": title,
         "slug": slug,
@@ -231,8 +303,19 @@ def _get_published_content(content_context: ContentContext) -> PublishedContent:
         "extras": extras,
         "cover_image_path": cover_image_path,
         "thumbnail_path": thumbnail_path,
+        "thumbnail_urls": headers_and_thumbnails["thumbnails"].model_dump(),
         "reading_time_minutes": reading_time_minutes,
     }
+    # Validators for conditional requests: the source mtime and a digest of the
+    # payload that ends up in the rendered page.
+    source_files = [index_path, *(content_context.img_files or [])]
+    published_content_dict["last_modified"] = get_modification_time(*source_files)
+    published_content_dict["digest"] = compute_digest(
+        json.dumps(published_content_dict, default=str, sort_keys=True),
+        *body_digests,
+    )
+    if lazy:
+        published_content_dict["content_context"] = content_context
     return PublishedContent(**published_content_dict)
 
 
@@ -260,21 +343,46 @@ def get_author_content():
     }
 
 
-def get_posts_content():
+# Rendered items from previous builds, reused while their sources are unchanged.
+_posts_cache: ItemCache[ContentItem] = ItemCache("html_posts")
+_projects_cache: ItemCache[ContentItem] = ItemCache("html_projects")
+
+
+def _build_content_item(content_context: ContentContext) -> ContentItem:
+    index_path = content_context.index_file
+    if not index_path.is_file():
+        raise FileNotFoundError(f"index file not found: {index_path!s}")
+    # Load markdown content and metadata once, for the page and the search index
+    markdown_content = load_markdown_content(index_path)
+    published_content = _get_published_content(content_context, markdown_content)
+    return ContentItem.from_published_content(
+        published_content,
+        get_search_document(published_content.title, markdown_content),
+        get_cover_key(THUMBNAILS_DIR, markdown_content.title),
+    )
+
+
+def get_posts_content() -> dict[str, ContentItem]:
     posts = {}
-    for content_obj in get_content_objects(POSTS_CONTENT_DIR):
-        content_context = get_content_context(content_obj)
-        content = _get_published_content(content_context)
-        posts[content.slug] = content.model_dump()
+    content_contexts = map(get_content_context, get_content_objects(POSTS_CONTENT_DIR))
+    content_items = _posts_cache.build_all(
+        content_contexts, _build_content_item, get_item_dependencies()
+    )
+    for content in content_items:
+        posts[content.slug] = content
     return posts
 
 
-def get_projects_content():
+def get_projects_content() -> dict[str, ContentItem]:
     projects = {}
-    for content_obj in get_content_objects(PROJECTS_CONTENT_DIR):
-        content_context = get_content_context(content_obj)
-        content = _get_published_content(content_context)
-        projects[content.slug] = content.model_dump()
+    content_contexts = map(
+        get_content_context, get_content_objects(PROJECTS_CONTENT_DIR)
+    )
+    content_items = _projects_cache.build_all(
+        content_contexts, _build_content_item, get_item_dependencies()
+    )
+    for content in content_items:
+        projects[content.slug] = content
     return projects
 
 
@@ -297,13 +405,124 @@ def get_homepage_data(posts_data, projects_data):
     }
 
 
-@cache
-def get_content():
-    data = {
-        "metadata": get_metadata_content(),
-        "author": get_author_content(),
-        "posts": get_posts_content(),
-        "projects": get_projects_content(),
-    }
-    data["homepage"] = get_homepage_data(data["posts"], data["projects"])
+def paginate(
+    items: Iterable[ContentItem], page_size: int = LIST_PAGE_SIZE
+) -> list[tuple[str, ...]]:
+    """Sort items for the list pages and split their slugs into pages.
+
+    Items are sorted newest first, then by title; items without a valid date
+    go last.
+
+    Args:
+        items: Posts or projects.
+        page_size: Entries per page.
+
+    Returns:
+        The slugs of each page. There's always at least one (maybe empty) page.
+    """
+    ordered = sorted(
+        items,
+        key=lambda item: (
+            item.published_on is None,
+            -(item.published_on or date.min).toordinal(),
+            item.title.casefold(),
+        ),
+    )
+    slugs = [item.slug for item in ordered]
+    pages = [
+        tuple(slugs[start : start + page_size])
+        for start in range(0, len(slugs), page_size)
+    ]
+    return pages or [()]
+
+
+_content: dict[str, Any] | None = None
+
+
+def build_content() -> dict[str, Any]:
+    """Build a new content snapshot, re-rendering only the changed items."""
+    clear_asset_index()
+    with build_stage("content"):
+        data = {
+            "metadata": get_metadata_content(),
+            "author": get_author_content(),
+            "posts": get_posts_content(),
+            "projects": get_projects_content(),
+        }
+        data["homepage"] = get_homepage_data(data["posts"], data["projects"])
+        data["listings"] = {
+            "posts": paginate(data["posts"].values()),
+            "projects": paginate(data["projects"].values()),
+        }
+        with build_stage("search_index"):
+            data["search"] = build_search_index(data)
+    # Validators for the parts shared by every page (metadata, author, homepage).
+    shared = {key: data[key] for key in ("metadata", "author", "homepage")}
+    data["digest"] = compute_digest(json.dumps(shared, default=str, sort_keys=True))
+    data["last_modified"] = get_modification_time(
+        META_CONTENT_FILE, AUTHOR_CONTENT_FILE, HOMEPAGE_CONTENT_FILE
+    )
+    with build_stage("feeds"):
+        data["feeds"] = build_feeds(data, lambda item: with_body(item).body)
+    with build_stage("sitemap"):
+        data["sitemap"] = build_sitemap(data)
+        data["robots"] = build_robots(data)
     return data
+
+
+def get_content() -> dict[str, Any]:
+    global _content
+    if _content is None:
+        _content = build_content()
+    return _content
+
+
+def set_content(content: dict[str, Any]) -> None:
+    """Atomically replace the content snapshot served by `get_content()`."""
+    global _content
+    _content = content
+
+
+# Bodies (UTF-8) rendered on request in lazy mode, with whether they contain
+# code, keyed by the digest of their item.
+_bodies: SizedLRUCache[str, tuple[bytes | None, bool]] = SizedLRUCache(
+    "html_bodies", RENDER_CACHE_MAX_SIZE, lambda rendered: len(rendered[0] or b"")
+)
+
+
+def _render_body(content_context: ContentContext) -> tuple[bytes | None, bool]:
+    body = load_markdown_content(content_context.index_file).body
+    if not body:
+        return None, TemplateArgs().code
+    parsed = _parse_markdown_cached(content_context, body)
+    return parsed["content"].encode("utf-8"), parsed["extras"]["code"]
+
+
+def get_item(section: Section, slug: str) -> ContentItem:
+    """Return a post or project of the current snapshot with its body.
+
+    In lazy mode (`LAZY_RENDERING`) the snapshot only holds the metadata used
+    by the list pages: the body is rendered on the first request and kept in a
+    least recently used cache bounded by `RENDER_CACHE_MAX_SIZE`.
+
+    Args:
+        section: Section of the item.
+        slug: Slug of the item.
+
+    Returns:
+        The item with its rendered body.
+
+    Raises:
+        KeyError: If there's no such item.
+    """
+    return with_body(get_content()[section][slug])
+
+
+def with_body(item: ContentItem) -> ContentItem:
+    """Return `item` with its body, rendering it first in lazy mode."""
+    if item.content_context is None:
+        return item
+    encoded_body, has_code = _bodies.get_or_build(
+        item.digest, partial(_render_body, item.content_context)
+    )
+    return replace(item, encoded_body=encoded_body, has_code=has_code)
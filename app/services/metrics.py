@@ -0,0 +1,202 @@
+import json
+import logging
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the latency histogram buckets.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Media type of the Prometheus text exposition format.
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+# Descriptions emitted as `# HELP` lines.
+METRICS_HELP = {
+    "http_request_duration_seconds": "Request latency per route.",
+    "page_render_duration_seconds": "Page rendering time on a page cache miss.",
+    "build_stage_duration_seconds": "Time spent in each content build stage.",
+    "cache_requests_total": "Cache lookups by cache and result.",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+_lock = threading.Lock()
+_counters: dict[str, dict[Labels, float]] = {}
+_histograms: dict[str, dict[Labels, _Histogram]] = {}
+# Per-item timings of the current build, dumped by `write_build_report()`.
+_build_timings: list[dict] = []
+
+
+def _get_labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def increment(name: str, amount: float = 1, **labels: str) -> None:
+    """Add `amount` to a counter."""
+    key = _get_labels(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Record a value (usually a duration in seconds) in a histogram."""
+    key = _get_labels(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        if key not in series:
+            series[key] = _Histogram()
+        series[key].observe(value)
+
+
+def count_cache_lookup(cache: str, hit: bool) -> None:
+    increment("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def timed(name: str, **labels: str) -> Generator[None]:
+    """Observe the wall time of the block in the `name` histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+@contextmanager
+def build_stage(stage: str, item: str | None = None) -> Generator[None]:
+    """Time a build stage, optionally for a single content item.
+
+    The duration is observed in `build_stage_duration_seconds` (labelled by
+    stage only, to keep the series count bounded) and kept for the build
+    report. Stages run in worker processes (`BUILD_WORKERS`) are not recorded.
+
+    Args:
+        stage: Name of the stage (e.g. `parse_markdown`).
+        item: Content item being built, if the stage is per item.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe("build_stage_duration_seconds", seconds, stage=stage)
+        with _lock:
+            _build_timings.append({"stage": stage, "item": item, "seconds": seconds})
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render_metrics() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines: list[str] = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            description = METRICS_HELP.get(name, name)
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for name, series in sorted(_histograms.items()):
+            description = METRICS_HELP.get(name, name)
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+            for labels, histogram in sorted(series.items()):
+                for bound, count in zip(
+                    histogram.buckets, histogram.counts, strict=True
+                ):
+                    le = _format_labels(labels, (("le", f"{bound:g}"),))
+                    lines.append(f"{name}_bucket{le} {count}")
+                le = _format_labels(labels, (("le", "+Inf"),))
+                lines.append(f"{name}_bucket{le} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_build_report() -> None:
+    with _lock:
+        _build_timings.clear()
+
+
+def get_build_report() -> dict:
+    """Summarize the timings recorded since the last `reset_build_report()`.
+
+    Returns:
+        Total seconds per stage, the per-item timings sorted from slowest to
+        fastest, and the cache lookup counters.
+    """
+    with _lock:
+        timings = list(_build_timings)
+        caches = [
+            {**dict(labels), "count": value}
+            for labels, value in sorted(
+                _counters.get("cache_requests_total", {}).items()
+            )
+        ]
+    stages: dict[str, float] = {}
+    for timing in timings:
+        stages[timing["stage"]] = stages.get(timing["stage"], 0) + timing["seconds"]
+    return {
+        "generated_at": datetime.now(UTC).isoformat(),
+        "stages": stages,
+        "items": sorted(
+            (timing for timing in timings if timing["item"] is not None),
+            key=lambda timing: timing["seconds"],
+            reverse=True,
+        ),
+        "caches": caches,
+    }
+
+
+def write_build_report(report_file: Path) -> None:
+    try:
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+        report_file.write_text(
+            json.dumps(get_build_report(), indent=2), encoding="utf-8"
+        )
+    except OSError:
+        logger.warning("Could not write build report: %s", report_file)
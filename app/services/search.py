@@ -0,0 +1,160 @@
+import heapq
+import math
+import re
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from app.schemas import MarkdownContent
+from app.services.common import SECTION_PATHS
+from app.types import Section
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Occurrences of a term count this many times depending on the field.
+FIELD_WEIGHTS = {"title": 5, "topic": 3, "description": 2, "body": 1}
+
+# BM25 term frequency saturation and document length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Results returned by a search, and longest query taken into account.
+MAX_RESULTS = 20
+MAX_QUERY_LENGTH = 200
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Split text into lowercase word tokens, dropping single characters."""
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.casefold()) if len(token) > 1]
+
+
+@dataclass(frozen=True, slots=True)
+class SearchDocument:
+    """Weighted term frequencies of a post or project."""
+
+    terms: tuple[str, ...]
+    frequencies: array
+
+    @property
+    def length(self) -> int:
+        return sum(self.frequencies)
+
+
+def get_search_document(name: str, markdown_content: MarkdownContent) -> SearchDocument:
+    """Count the weighted terms of a post or project.
+
+    Args:
+        name: Title of the page, after the file (or directory) name.
+        markdown_content: Source of the item, as loaded to render it.
+
+    Returns:
+        The terms of the item and their weighted frequencies.
+    """
+    fields = {
+        "title": f"{name} {markdown_content.title}",
+        "topic": markdown_content.topic,
+        "description": markdown_content.description,
+        "body": markdown_content.body,
+    }
+    counts: Counter[str] = Counter()
+    for field, text in fields.items():
+        for token in tokenize(text):
+            counts[token] += FIELD_WEIGHTS[field]
+    return SearchDocument(
+        # Interned, so the index keys and the cached documents share them.
+        terms=tuple(sys.intern(term) for term in counts),
+        frequencies=array("I", counts.values()),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class SearchIndex:
+    """Inverted index of the posts and projects, ranked with BM25.
+
+    Attributes:
+        documents: Section and slug of each document, by document id.
+        lengths: Weighted number of terms of each document, by document id.
+        average_length: Mean of `lengths`.
+        postings: Ids of the documents containing each term, and the
+            weighted frequency of the term in each of them.
+    """
+
+    documents: tuple[tuple[Section, str], ...]
+    lengths: array
+    average_length: float
+    postings: dict[str, tuple[array, array]]
+
+    @classmethod
+    def build(
+        cls, documents: Iterable[tuple[tuple[Section, str], SearchDocument]]
+    ) -> "SearchIndex":
+        keys: list[tuple[Section, str]] = []
+        lengths = array("I")
+        postings: dict[str, tuple[array, array]] = {}
+        for doc_id, (key, document) in enumerate(documents):
+            keys.append(key)
+            lengths.append(document.length)
+            for term, frequency in zip(
+                document.terms, document.frequencies, strict=True
+            ):
+                doc_ids, frequencies = postings.setdefault(
+                    term, (array("I"), array("I"))
+                )
+                doc_ids.append(doc_id)
+                frequencies.append(frequency)
+        return cls(
+            documents=tuple(keys),
+            lengths=lengths,
+            average_length=(sum(lengths) / len(lengths) if lengths else 0) or 1,
+            postings=postings,
+        )
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> list[tuple[Section, str]]:
+        """Rank the documents matching any term of `query`.
+
+        Args:
+            query: Free text; only its first `MAX_QUERY_LENGTH` characters
+                are used.
+            limit: Maximum number of results.
+
+        Returns:
+            Section and slug of the best matches, best first.
+        """
+        count = len(self.documents)
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query[:MAX_QUERY_LENGTH])):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            doc_ids, frequencies = posting
+            matches = len(doc_ids)
+            idf = math.log(1 + (count - matches + 0.5) / (matches + 0.5))
+            for doc_id, frequency in zip(doc_ids, frequencies, strict=True):
+                norm = BM25_K1 * (
+                    1 - BM25_B + BM25_B * self.lengths[doc_id] / self.average_length
+                )
+                score = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        # Ties keep the directory listing order.
+        best = heapq.nsmallest(
+            limit, scores.items(), key=lambda item: (-item[1], item[0])
+        )
+        return [self.documents[doc_id] for doc_id, _ in best]
+
+
+def build_search_index(content: dict[str, Any]) -> SearchIndex:
+    """Index the posts and projects of a content snapshot.
+
+    Items carry their search document, so unchanged items reused between
+    builds aren't re-tokenized.
+    """
+    return SearchIndex.build(
+        ((section, item.slug), item.search_document)
+        for section in SECTION_PATHS
+        for item in content[section].values()
+    )
@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Any
+from xml.etree import ElementTree
+
+from app.services.common import SECTION_PATHS, get_site_url
+from app.services.store import GeneratedFile
+
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+# Directives of the `robots` metadata that keep crawlers out of the site.
+NOINDEX_DIRECTIVES = {"noindex", "none"}
+
+# Pages not worth crawling: their content is reachable from the sitemap.
+DISALLOWED_PATHS = ("/search",)
+
+
+def is_indexable(metadata: dict[str, Any]) -> bool:
+    directives = {
+        directive.strip().casefold() for directive in metadata["robots"].split(",")
+    }
+    return not directives & NOINDEX_DIRECTIVES
+
+
+def get_sitemap_urls(content: dict[str, Any]) -> dict[str, datetime]:
+    """Map the URL of every indexable page to its last modification."""
+    site_url = get_site_url(content["metadata"])
+    shared = content["last_modified"]
+    lists: dict[str, datetime] = {}
+    details: dict[str, datetime] = {}
+    for section, path in SECTION_PATHS.items():
+        items = content[section]
+        lists[f"{site_url}/{path}"] = max(
+            [shared, *(item.last_modified for item in items.values())]
+        )
+        # Newest first, like the list pages.
+        for slug in (slug for page in content["listings"][section] for slug in page):
+            details[f"{site_url}/{path}/{slug}"] = items[slug].updated_at
+    return {
+        f"{site_url}/": max(lists.values()),
+        f"{site_url}/author": shared,
+        **lists,
+        **details,
+    }
+
+
+def build_sitemap(content: dict[str, Any]) -> GeneratedFile:
+    """Serialize the sitemap of the site, empty if it must not be indexed."""
+    urls = get_sitemap_urls(content) if is_indexable(content["metadata"]) else {}
+    urlset = ElementTree.Element("urlset", {"xmlns": SITEMAP_NAMESPACE})
+    for url, last_modified in urls.items():
+        element = ElementTree.SubElement(urlset, "url")
+        ElementTree.SubElement(element, "loc").text = url
+        ElementTree.SubElement(element, "lastmod").text = last_modified.isoformat()
+    body = ElementTree.tostring(urlset, encoding="utf-8", xml_declaration=True)
+    return GeneratedFile.from_body(
+        body, "application/xml", max([content["last_modified"], *urls.values()])
+    )
+
+
+def build_robots(content: dict[str, Any]) -> GeneratedFile:
+    """Serialize the robots.txt of the site, driven by the `robots` metadata."""
+    metadata = content["metadata"]
+    lines = ["User-agent: *"]
+    if is_indexable(metadata):
+        lines.extend(f"Disallow: {path}" for path in DISALLOWED_PATHS)
+        lines.extend(["", f"Sitemap: {get_site_url(metadata)}/sitemap.xml"])
+    else:
+        lines.append("Disallow: /")
+    body = "\n".join([*lines, ""]).encode("utf-8")
+    return GeneratedFile.from_body(body, "text/plain", content["last_modified"])
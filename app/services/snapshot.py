@@ -0,0 +1,103 @@
+import logging
+import os
+import pickle
+from pathlib import Path
+
+from app.config import (
+    ASSETS_MANIFEST_FILE,
+    CONTENT_DIR,
+    FEED_FULL_CONTENT,
+    FEED_MAX_ENTRIES,
+    IMAGES_MANIFEST_FILE,
+    LAZY_RENDERING,
+    LIST_PAGE_SIZE,
+)
+from app.services.ansi import build_ansi_content, set_ansi_content
+from app.services.build_cache import get_renderer_fingerprint, get_source_fingerprint
+from app.services.common import compute_digest
+from app.services.html import build_content, set_content
+
+logger = logging.getLogger(__name__)
+
+# Modules whose code shapes the snapshot: the services and the schemas.
+_SOURCE_FILES = sorted(
+    [*Path(__file__).parent.glob("*.py"), Path(__file__).parent.parent / "schemas.py"]
+)
+
+
+def get_snapshot_key() -> str:
+    """Identify everything a content snapshot is built from.
+
+    Returns:
+        A digest of the content files (path, mtime and size), the image and
+        asset manifests, the rendering code, the renderer versions and the
+        settings shaping the content (rendering mode, list and feed sizes).
+        A snapshot with another key is stale.
+    """
+    parts = [
+        get_renderer_fingerprint(
+            "markdown", "beautifulsoup4", "pygments", "rich", "pydantic"
+        ),
+        *(get_source_fingerprint(str(path)) for path in _SOURCE_FILES),
+        f"lazy={LAZY_RENDERING}",
+        f"list_page_size={LIST_PAGE_SIZE}",
+        f"feeds={FEED_MAX_ENTRIES}:{FEED_FULL_CONTENT}",
+    ]
+    for path in sorted(CONTENT_DIR.rglob("*")):
+        if path.is_file():
+            stat = path.stat()
+            relative_path = path.relative_to(CONTENT_DIR).as_posix()
+            parts.append(f"{relative_path}:{stat.st_mtime_ns}:{stat.st_size}")
+    for manifest_file in (IMAGES_MANIFEST_FILE, ASSETS_MANIFEST_FILE):
+        if manifest_file.is_file():
+            parts.append(manifest_file.read_text(encoding="utf-8"))
+    return compute_digest(*parts)
+
+
+def write_snapshot(snapshot_file: Path) -> None:
+    """Build the HTML and ANSI content and serialize them to `snapshot_file`.
+
+    The key is written first, so stale snapshots are detected without
+    loading the content. The file is replaced atomically.
+    """
+    content, ansi_content = build_content(), build_ansi_content()
+    snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = snapshot_file.with_name(f"{snapshot_file.name}.tmp-{os.getpid()}")
+    with tmp_file.open("wb") as file:
+        pickle.dump(get_snapshot_key(), file, pickle.HIGHEST_PROTOCOL)
+        pickle.dump((content, ansi_content), file, pickle.HIGHEST_PROTOCOL)
+    tmp_file.replace(snapshot_file)
+
+
+def load_snapshot(snapshot_file: Path) -> bool:
+    """Serve the content of a snapshot written by `write_snapshot()`.
+
+    The images the build copies into the static directory are not part of the
+    snapshot: it must be loaded from the tree it was built in.
+
+    Args:
+        snapshot_file: Snapshot to load.
+
+    Returns:
+        True if the snapshot was loaded; False if it is missing, stale or
+        unreadable, in which case the content has to be built.
+    """
+    if not snapshot_file.is_file():
+        return False
+    try:
+        with snapshot_file.open("rb") as file:
+            if pickle.load(file) != get_snapshot_key():
+                logger.info("Ignoring stale content snapshot: %s", snapshot_file)
+                return False
+            content, ansi_content = pickle.load(file)
+    except Exception:
+        # Unpickling runs the code of the classes it restores: a snapshot
+        # written by other code can fail in many ways (missing modules or
+        # attributes, changed constructors). Any failure means a fresh build.
+        logger.warning(
+            "Could not load content snapshot: %s", snapshot_file, exc_info=True
+        )
+        return False
+    set_content(content)
+    set_ansi_content(ansi_content)
+    return True
@@ -0,0 +1,197 @@
+import sys
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.config import THUMBNAILS_DIR
+from app.schemas import ContentContext, CoverUrls, GenericANSIContent, PublishedContent
+from app.services.assets import get_cover_index
+from app.services.common import compute_digest, parse_date
+
+if TYPE_CHECKING:
+    from app.services.search import SearchDocument
+
+
+def _intern(value: object) -> str:
+    # Equal strings of different records (e.g. the HTML and ANSI entries of an
+    # item, or the cover paths shared between items) point to a single object.
+    return sys.intern(str(value))
+
+
+def _intern_optional(value: object | None) -> str | None:
+    return None if value is None else _intern(value)
+
+
+def _encode(body: str | None) -> bytes | None:
+    return None if body is None else body.encode("utf-8")
+
+
+def _decode(body: bytes | None) -> str | None:
+    return None if body is None else body.decode("utf-8")
+
+
+def format_reading_time(minutes: int) -> str:
+    suffix = "min" if minutes == 1 else "mins"
+    return f"{minutes} {suffix}"
+
+
+@dataclass(frozen=True, slots=True)
+class ContentItem:
+    """Post or project of the HTML content snapshot.
+
+    A compact, immutable stand-in for `PublishedContent`: the rendered body is
+    kept as UTF-8 bytes and decoded when a page is rendered, and repeated
+    strings are interned.
+
+    Attributes:
+        published_on: `publish_date` parsed, or None if it isn't a valid date.
+        thumbnail_cover: Number of the thumbnail in the cover index, which
+            holds the `CoverUrls` shared by every item with that cover.
+        has_code: Whether the body contains code blocks; None (like
+            `encoded_body`) until the body is rendered in lazy mode.
+        search_document: Terms of the item for the search index.
+        content_context: Source of the item, set in lazy mode only.
+    """
+
+    slug: str
+    title: str
+    description: str | None
+    topic: str | None
+    repository: str | None
+    website: str | None
+    publish_date: str
+    published_on: date | None
+    reading_time_minutes: int
+    cover_image: str
+    thumbnail: str
+    thumbnail_cover: int
+    encoded_body: bytes | None
+    has_code: bool | None
+    last_modified: datetime
+    digest: str
+    search_document: "SearchDocument"
+    content_context: ContentContext | None = None
+
+    @classmethod
+    def from_published_content(
+        cls,
+        content: PublishedContent,
+        search_document: "SearchDocument",
+        thumbnail_cover: int,
+    ) -> "ContentItem":
+        extras = content.extras
+        return cls(
+            slug=_intern(content.slug),
+            title=_intern(content.title),
+            description=_intern_optional(content.description),
+            topic=_intern_optional(content.topic),
+            repository=_intern_optional(content.repository),
+            website=_intern_optional(content.website),
+            publish_date=_intern(content.publish_date),
+            published_on=parse_date(content.publish_date),
+            reading_time_minutes=content.reading_time_minutes,
+            cover_image=_intern(content.cover_image),
+            thumbnail=_intern(content.thumbnail),
+            thumbnail_cover=thumbnail_cover,
+            encoded_body=_encode(content.body),
+            has_code=None if extras is None else bool(extras.get("code")),
+            last_modified=content.last_modified,
+            digest=content.digest,
+            search_document=search_document,
+            content_context=content.content_context,
+        )
+
+    @property
+    def body(self) -> str | None:
+        return _decode(self.encoded_body)
+
+    @property
+    def extras(self) -> dict | None:
+        return None if self.has_code is None else {"code": self.has_code}
+
+    @property
+    def thumbnail_urls(self) -> CoverUrls:
+        return get_cover_index(THUMBNAILS_DIR)[self.thumbnail_cover]
+
+    @property
+    def published_at(self) -> datetime:
+        """Start of the publish day (UTC), or the last modification without one."""
+        if self.published_on is None:
+            return self.last_modified
+        return datetime.combine(self.published_on, time(), UTC)
+
+    @property
+    def updated_at(self) -> datetime:
+        return max(self.published_at, self.last_modified)
+
+    @property
+    def reading_time(self) -> str:
+        return format_reading_time(self.reading_time_minutes)
+
+
+@dataclass(frozen=True, slots=True)
+class ANSIItem:
+    """Post or project of the ANSI content snapshot.
+
+    A compact, immutable stand-in for `GenericANSIContent`. The header art is
+    shared between items, so only its path is kept.
+
+    Attributes:
+        content_context: Source of the item, set in lazy mode only.
+    """
+
+    slug: str
+    title: str
+    publish_date: str
+    reading_time_minutes: int
+    header_path: Path
+    encoded_body: bytes | None
+    last_modified: datetime
+    digest: str
+    content_context: ContentContext | None = None
+
+    @classmethod
+    def from_ansi_content(
+        cls, content: GenericANSIContent, header_path: Path
+    ) -> "ANSIItem":
+        return cls(
+            slug=_intern(content.slug),
+            title=_intern(content.title),
+            publish_date=_intern(content.publish_date),
+            reading_time_minutes=content.reading_time_minutes,
+            header_path=header_path,
+            encoded_body=_encode(content.body),
+            last_modified=content.last_modified,
+            digest=content.digest,
+            content_context=content.content_context,
+        )
+
+    @property
+    def body(self) -> str | None:
+        return _decode(self.encoded_body)
+
+    @property
+    def reading_time(self) -> str:
+        return format_reading_time(self.reading_time_minutes)
+
+
+@dataclass(frozen=True, slots=True)
+class GeneratedFile:
+    """Document serialized when the content is built (e.g. a feed), served as is."""
+
+    body: bytes
+    media_type: str
+    digest: str
+    last_modified: datetime
+
+    @classmethod
+    def from_body(
+        cls, body: bytes, media_type: str, last_modified: datetime
+    ) -> "GeneratedFile":
+        return cls(
+            body=body,
+            media_type=media_type,
+            digest=compute_digest(body.decode("utf-8")),
+            last_modified=last_modified,
+        )
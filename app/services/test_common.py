@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from app.schemas import ContentContext
+from app.services.common import ItemCache, get_content_context, get_content_objects
+
+
+def build(content_context: ContentContext) -> tuple[str, str]:
+    # Module level, so it can also run in a process pool.
+    index_file = content_context.index_file
+    return index_file.name, index_file.read_text(encoding="utf-8")
+
+
+def build_all(
+    cache: ItemCache[tuple[str, str]], directory: Path, dependencies: str = ""
+) -> list[tuple[str, str]]:
+    content_contexts = map(get_content_context, sorted(get_content_objects(directory)))
+    return cache.build_all(content_contexts, build, dependencies)
+
+
+@pytest.fixture
+def content_dir(tmp_path: Path) -> Path:
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.md").write_text(f"# {name}", encoding="utf-8")
+    return tmp_path
+
+
+def test_item_cache_reuses_unchanged_items(content_dir: Path):
+    cache: ItemCache[tuple[str, str]] = ItemCache("test")
+    first = build_all(cache, content_dir)
+    second = build_all(cache, content_dir)
+    assert second == [("a.md", "# a"), ("b.md", "# b"), ("c.md", "# c")]
+    assert all(old is new for old, new in zip(first, second, strict=True))
+
+
+def test_item_cache_rebuilds_edited_items(content_dir: Path):
+    cache: ItemCache[tuple[str, str]] = ItemCache("test")
+    first = build_all(cache, content_dir)
+    (content_dir / "b.md").write_text("# b, edited", encoding="utf-8")
+    second = build_all(cache, content_dir)
+    assert second[1] == ("b.md", "# b, edited")
+    assert second[0] is first[0]
+    assert second[2] is first[2]
+
+
+def test_item_cache_drops_deleted_items(content_dir: Path):
+    cache: ItemCache[tuple[str, str]] = ItemCache("test")
+    first = build_all(cache, content_dir)
+    (content_dir / "b.md").unlink()
+    second = build_all(cache, content_dir)
+    assert second == [("a.md", "# a"), ("c.md", "# c")]
+    assert second[0] is first[0]
+    assert second[1] is first[2]
+    # Restoring the file builds it again instead of reviving the old result.
+    (content_dir / "b.md").write_text("# b", encoding="utf-8")
+    third = build_all(cache, content_dir)
+    assert third[1] == first[1]
+    assert third[1] is not first[1]
+
+
+def test_item_cache_rebuilds_items_with_changed_images(tmp_path: Path):
+    item_dir = tmp_path / "item"
+    (item_dir / "images").mkdir(parents=True)
+    (item_dir / "index.md").write_text("# item", encoding="utf-8")
+    cache: ItemCache[tuple[str, str]] = ItemCache("test")
+    first = build_all(cache, tmp_path)
+    (item_dir / "images" / "figure.png").write_bytes(b"png")
+    second = build_all(cache, tmp_path)
+    assert second == first
+    assert second[0] is not first[0]
+
+
+def test_item_cache_rebuilds_every_item_when_dependencies_change(content_dir: Path):
+    cache: ItemCache[tuple[str, str]] = ItemCache("test")
+    first = build_all(cache, content_dir, dependencies="covers-v1")
+    second = build_all(cache, content_dir, dependencies="covers-v2")
+    assert second == first
+    assert not any(old is new for old, new in zip(first, second, strict=True))
@@ -0,0 +1,60 @@
+from array import array
+from datetime import UTC, date, datetime
+
+from app.services.html import paginate
+from app.services.search import SearchDocument
+from app.services.store import ContentItem
+
+
+def make_item(slug: str, title: str, published_on: date | None) -> ContentItem:
+    return ContentItem(
+        slug=slug,
+        title=title,
+        description=None,
+        topic=None,
+        repository=None,
+        website=None,
+        publish_date=published_on.isoformat() if published_on else "unknown",
+        published_on=published_on,
+        reading_time_minutes=1,
+        cover_image="",
+        thumbnail="",
+        thumbnail_cover=1,
+        encoded_body=None,
+        has_code=False,
+        last_modified=datetime(2025, 1, 1, tzinfo=UTC),
+        digest=slug,
+        search_document=SearchDocument(terms=(), frequencies=array("I")),
+    )
+
+
+def test_paginate_without_items_has_one_empty_page():
+    assert paginate([], page_size=2) == [()]
+
+
+def test_paginate_fills_the_last_page_exactly():
+    items = [make_item(f"p{day}", "Post", date(2025, 1, day)) for day in range(1, 5)]
+    assert paginate(items, page_size=2) == [("p4", "p3"), ("p2", "p1")]
+
+
+def test_paginate_puts_the_remainder_on_a_short_last_page():
+    items = [make_item(f"p{day}", "Post", date(2025, 1, day)) for day in range(1, 4)]
+    assert paginate(items, page_size=2) == [("p3", "p2"), ("p1",)]
+
+
+def test_paginate_single_page():
+    items = [make_item("a", "A", date(2025, 1, 1))]
+    assert paginate(items, page_size=2) == [("a",)]
+
+
+def test_paginate_orders_by_date_then_title_and_undated_last():
+    items = [
+        make_item("undated", "A", None),
+        make_item("old", "A", date(2024, 6, 1)),
+        make_item("gamma", "gamma", date(2025, 1, 1)),
+        make_item("beta", "Beta", date(2025, 1, 1)),
+        make_item("alpha", "alpha", date(2025, 1, 1)),
+    ]
+    assert paginate(items, page_size=10) == [
+        ("alpha", "beta", "gamma", "old", "undated")
+    ]
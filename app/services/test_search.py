@@ -0,0 +1,103 @@
+from app.schemas import MarkdownContent
+from app.services.search import (
+    SearchIndex,
+    build_search_index,
+    get_search_document,
+    tokenize,
+)
+from app.types import Section
+
+
+def build_index(*items: tuple[Section, str, MarkdownContent]) -> SearchIndex:
+    return SearchIndex.build(
+        ((section, slug), get_search_document(slug, content))
+        for section, slug, content in items
+    )
+
+
+def test_tokenize_casefolds_and_drops_single_characters():
+    assert tokenize("Rust's a Fast, SAFE language!") == [
+        "rust",
+        "fast",
+        "safe",
+        "language",
+    ]
+    assert tokenize(None) == []
+
+
+def test_get_search_document_weights_fields():
+    document = get_search_document(
+        "caching",
+        MarkdownContent(
+            title="HTTP caching",
+            topic="web",
+            description="ETags",
+            body="caching web pages",
+        ),
+    )
+    frequencies = dict(zip(document.terms, document.frequencies, strict=True))
+    # Title (file name and front matter) 5 + 5, body 1.
+    assert frequencies["caching"] == 11
+    # Topic 3, body 1.
+    assert frequencies["web"] == 4
+    assert frequencies["etags"] == 2
+    assert frequencies["pages"] == 1
+    assert document.length == sum(frequencies.values())
+
+
+def test_search_ranks_title_matches_above_body_matches():
+    index = build_index(
+        ("posts", "body", MarkdownContent(title="Notes", body="about caching")),
+        ("posts", "title", MarkdownContent(title="Caching", body="notes")),
+        ("projects", "other", MarkdownContent(title="Other", body="unrelated")),
+    )
+    assert index.search("caching") == [("posts", "title"), ("posts", "body")]
+
+
+def test_search_favors_rare_terms():
+    index = build_index(
+        ("posts", "common", MarkdownContent(title="One", body="python python")),
+        ("posts", "rare", MarkdownContent(title="Two", body="python zig")),
+        ("posts", "filler", MarkdownContent(title="Three", body="python")),
+    )
+    assert index.search("zig python")[0] == ("posts", "rare")
+
+
+def test_search_breaks_ties_by_listing_order_and_limits_results():
+    index = build_index(
+        ("posts", "first", MarkdownContent(title="Alpha", body="shared")),
+        ("posts", "second", MarkdownContent(title="Bravo", body="shared")),
+        ("projects", "third", MarkdownContent(title="Delta", body="shared")),
+    )
+    assert index.search("shared") == [
+        ("posts", "first"),
+        ("posts", "second"),
+        ("projects", "third"),
+    ]
+    assert index.search("shared", limit=1) == [("posts", "first")]
+
+
+def test_search_without_matches():
+    index = build_index(("posts", "a", MarkdownContent(title="Alpha", body="text")))
+    assert index.search("missing") == []
+    assert index.search("") == []
+    assert SearchIndex.build([]).search("anything") == []
+
+
+def test_build_search_index_covers_every_section():
+    posts = {"a": MarkdownContent(title="Alpha", body="text")}
+    projects = {"b": MarkdownContent(title="Bravo", body="text")}
+
+    class Item:
+        def __init__(self, slug: str, content: MarkdownContent) -> None:
+            self.slug = slug
+            self.search_document = get_search_document(slug, content)
+
+    content = {
+        "posts": {slug: Item(slug, item) for slug, item in posts.items()},
+        "projects": {slug: Item(slug, item) for slug, item in projects.items()},
+    }
+    assert build_search_index(content).search("text") == [
+        ("posts", "a"),
+        ("projects", "b"),
+    ]
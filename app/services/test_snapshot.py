@@ -0,0 +1,79 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from app.services import snapshot
+from app.services.snapshot import load_snapshot
+
+KEY = "snapshot-key"
+
+
+@pytest.fixture
+def loaded(monkeypatch: pytest.MonkeyPatch) -> list:
+    """Fix the snapshot key and record the content handed to the views."""
+    loaded: list = []
+    monkeypatch.setattr(snapshot, "get_snapshot_key", lambda: KEY)
+    monkeypatch.setattr(snapshot, "set_content", lambda content: loaded.append(content))
+    monkeypatch.setattr(
+        snapshot, "set_ansi_content", lambda content: loaded.append(content)
+    )
+    return loaded
+
+
+def write(snapshot_file: Path, *objects: object) -> None:
+    with snapshot_file.open("wb") as file:
+        for obj in objects:
+            pickle.dump(obj, file, pickle.HIGHEST_PROTOCOL)
+
+
+def test_load_snapshot_sets_the_content(tmp_path: Path, loaded: list):
+    snapshot_file = tmp_path / "snapshot.pickle"
+    write(snapshot_file, KEY, ({"posts": {}}, {"posts": {}, "projects": {}}))
+    assert load_snapshot(snapshot_file)
+    assert loaded == [{"posts": {}}, {"posts": {}, "projects": {}}]
+
+
+def test_load_snapshot_without_file(tmp_path: Path, loaded: list):
+    assert not load_snapshot(tmp_path / "missing.pickle")
+    assert loaded == []
+
+
+def test_load_snapshot_ignores_stale_snapshots(tmp_path: Path, loaded: list):
+    snapshot_file = tmp_path / "snapshot.pickle"
+    write(snapshot_file, "other-key", ({}, {}))
+    assert not load_snapshot(snapshot_file)
+    assert loaded == []
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"not a pickle",
+        b"",
+        # Valid key, truncated content.
+        pickle.dumps(KEY, pickle.HIGHEST_PROTOCOL),
+    ],
+)
+def test_load_snapshot_falls_back_on_unreadable_snapshots(
+    tmp_path: Path, loaded: list, data: bytes
+):
+    snapshot_file = tmp_path / "snapshot.pickle"
+    snapshot_file.write_bytes(data)
+    assert not load_snapshot(snapshot_file)
+    assert loaded == []
+
+
+class Renamed:
+    pass
+
+
+def test_load_snapshot_falls_back_when_classes_changed(
+    tmp_path: Path, loaded: list, monkeypatch: pytest.MonkeyPatch
+):
+    snapshot_file = tmp_path / "snapshot.pickle"
+    write(snapshot_file, KEY, (Renamed(), {}))
+    # Snapshots written by older code may reference classes that are gone.
+    monkeypatch.delitem(globals(), "Renamed")
+    assert not load_snapshot(snapshot_file)
+    assert loaded == []
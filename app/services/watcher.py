@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from app.config import (
+    ASSETS_MANIFEST_FILE,
+    AUTHOR_CONTENT_DIR,
+    HEADERS_DIR,
+    HOMEPAGE_CONTENT_FILE,
+    IMAGES_MANIFEST_FILE,
+    META_CONTENT_FILE,
+    POSTS_CONTENT_DIR,
+    PROJECTS_CONTENT_DIR,
+    TEMPLATES_DIR,
+    THUMBNAILS_DIR,
+)
+from app.services.assets import is_fingerprinted
+
+# Content sources, plus the covers, manifests and templates that the built
+# items and pages embed.
+WATCHED_PATHS = (
+    AUTHOR_CONTENT_DIR,
+    HOMEPAGE_CONTENT_FILE,
+    META_CONTENT_FILE,
+    POSTS_CONTENT_DIR,
+    PROJECTS_CONTENT_DIR,
+    HEADERS_DIR,
+    THUMBNAILS_DIR,
+    IMAGES_MANIFEST_FILE,
+    ASSETS_MANIFEST_FILE,
+    TEMPLATES_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_watched_files_state() -> dict[Path, tuple[int, int]]:
+    """Collect (mtime in ns, size) for every file under the watched paths.
+
+    Returns:
+        dict[Path, tuple[int, int]]: File state keyed by path. Added, removed,
+            and edited files all produce a different mapping.
+    """
+    state: dict[Path, tuple[int, int]] = {}
+    for watched_path in WATCHED_PATHS:
+        paths = watched_path.rglob("*") if watched_path.is_dir() else [watched_path]
+        for path in paths:
+            if is_fingerprinted(path):
+                # Copies created on first use; their source is watched already.
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Removed between listing and stat; the next poll will see it.
+                continue
+            if path.is_file():
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+async def watch_content(
+    on_change: Callable[[], Awaitable[None]],
+    interval: float,
+) -> None:
+    """Poll the content sources and call `on_change` whenever they change.
+
+    Polling by mtime is used instead of inotify so that it also works on
+    bind-mounted volumes inside containers.
+
+    Args:
+        on_change: Coroutine function that rebuilds the content.
+        interval: Seconds between polls.
+    """
+    state = await asyncio.to_thread(get_watched_files_state)
+    while True:
+        await asyncio.sleep(interval)
+        new_state = await asyncio.to_thread(get_watched_files_state)
+        if new_state == state:
+            continue
+        state = new_state
+        try:
+            await on_change()
+        except Exception:
+            # Keep serving the previous snapshot until the sources are fixed.
+            logger.exception("Content rebuild failed")
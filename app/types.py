@@ -1,6 +1,16 @@
-from typing import TypedDict
+from typing import Literal, TypedDict
 
-from app.schemas import CoverUrls, PostANSIContent, ProjectANSIContent
+from app.schemas import CoverUrls
+from app.services.store import ANSIItem
+
+# Content sections with a list page and a detail page per item
+Section = Literal["posts", "projects"]
+
+# Syndication formats the post and project feeds are served in
+FeedFormat = Literal["atom", "rss", "json"]
+
+# Color depths the ANSI documents are served in ("none" is plain text)
+ColorSystemName = Literal["truecolor", "256", "standard", "none"]
 
 
 class HeadersAndThumbnailsDict(TypedDict):
@@ -9,5 +19,5 @@ class HeadersAndThumbnailsDict(TypedDict):
 
 
 class ANSIContent(TypedDict):
-    posts: dict[str, PostANSIContent]
-    projects: dict[str, ProjectANSIContent]
+    posts: dict[str, ANSIItem]
+    projects: dict[str, ANSIItem]
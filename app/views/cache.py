@@ -0,0 +1,235 @@
+import json
+from collections.abc import Callable, Collection
+from datetime import datetime
+from email.utils import format_datetime
+from functools import cache
+
+from fastapi import Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+from app.config import PAGE_CACHE_HOSTS, PAGE_CACHE_MAX_SIZE
+from app.schemas import CachedPage, EncodedBody, PageValidators
+from app.services.assets import get_asset_manifest
+from app.services.build_cache import get_templates_fingerprint
+from app.services.common import SizedLRUCache, compute_digest
+from app.services.compression import compress_variants, get_available_encoders
+from app.services.metrics import timed
+from app.views.utils import (
+    POST_ANSI_TEMPLATE,
+    PROJECT_ANSI_TEMPLATE,
+    is_not_modified,
+    negotiate_encoding,
+)
+
+# Rendered pages keyed by (base URL, page key). The base URL is part of the key
+# because templates resolve `url_for()` into absolute URLs, and it comes from
+# the client: only the hosts in `PAGE_CACHE_HOSTS` are cached.
+_pages: SizedLRUCache[tuple[str, str], CachedPage] = SizedLRUCache(
+    "pages",
+    PAGE_CACHE_MAX_SIZE,
+    lambda page: sum(len(variant.body) for variant in page.variants.values()),
+)
+
+PageRenderer = Callable[[Request], Response]
+PageValidatorsGetter = Callable[[], PageValidators]
+
+
+@cache
+def get_render_version() -> str:
+    """Digest of every template and the assets manifest, versioning page ETags."""
+    assets = json.dumps(get_asset_manifest(), sort_keys=True)
+    return compute_digest(
+        POST_ANSI_TEMPLATE,
+        PROJECT_ANSI_TEMPLATE,
+        assets,
+        get_templates_fingerprint(),
+    )
+
+
+def compute_etag(*parts: str) -> str:
+    return f'"{compute_digest(*parts)}"'
+
+
+def _variant_etag(etag: str, encoding: str) -> str:
+    # Each encoding is a different representation, so it needs its own ETag.
+    if encoding == "identity":
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def is_cacheable_host(request: Request) -> bool:
+    base_url = request.base_url
+    return (
+        base_url.scheme in ("http", "https")
+        and base_url.netloc.casefold() in PAGE_CACHE_HOSTS
+    )
+
+
+def _page_etag(request: Request, key: str, validators: PageValidators) -> str:
+    return compute_etag(
+        str(request.base_url), key, get_render_version(), validators.digest
+    )
+
+
+def _validator_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {"etag": etag, "vary": "Accept-Encoding"}
+    if last_modified is not None:
+        headers["last-modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def build_cached_page(
+    body: bytes,
+    status_code: int = 200,
+    media_type: str = "text/html",
+    etag: str | None = None,
+    validators: PageValidators | None = None,
+) -> CachedPage:
+    """Wrap a rendered body with its compressed variants and response headers.
+
+    Args:
+        body: Uncompressed response body.
+        status_code: HTTP status code to reply with.
+        media_type: Media type of the body (charset is appended for text).
+        etag: ETag of the page. Defaults to a digest of `body`.
+        validators: Validators of the page sources, used for `Last-Modified`.
+
+    Returns:
+        A CachedPage ready to be served without further processing.
+    """
+    etag = etag or compute_etag(body.decode("utf-8"))
+    last_modified = validators.last_modified if validators else None
+    content_type = media_type
+    if media_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    variants: dict[str, EncodedBody] = {}
+    for encoding, encoded_body in compress_variants(body).items():
+        headers = {
+            "content-length": str(len(encoded_body)),
+            "content-type": content_type,
+            **_validator_headers(_variant_etag(etag, encoding), last_modified),
+        }
+        if encoding != "identity":
+            headers["content-encoding"] = encoding
+        variants[encoding] = EncodedBody(body=encoded_body, headers=headers)
+    return CachedPage(
+        etag=etag,
+        last_modified=last_modified,
+        status_code=status_code,
+        media_type=media_type,
+        variants=variants,
+    )
+
+
+def _not_modified_response(
+    request: Request,
+    etag: str,
+    last_modified: datetime | None,
+    encodings: Collection[str],
+) -> Response | None:
+    etags = {_variant_etag(etag, encoding) for encoding in encodings}
+    if not is_not_modified(request.headers, etags, last_modified):
+        return None
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"), encodings)
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=_validator_headers(_variant_etag(etag, encoding), last_modified),
+    )
+
+
+def _render_page(
+    request: Request,
+    render: PageRenderer,
+    page_name: str,
+    etag: str | None,
+    validators: PageValidators | None,
+) -> CachedPage:
+    with timed("page_render_duration_seconds", page=page_name):
+        response = render(request)
+    return build_cached_page(
+        bytes(response.body),
+        status_code=response.status_code,
+        media_type=response.media_type or "text/html",
+        etag=etag,
+        validators=validators,
+    )
+
+
+def _render_uncached(
+    request: Request, render: PageRenderer, page_name: str
+) -> Response:
+    with timed("page_render_duration_seconds", page=page_name):
+        return render(request)
+
+
+async def get_page_response(
+    request: Request,
+    key: str,
+    render: PageRenderer,
+    validators: PageValidatorsGetter | None = None,
+) -> Response:
+    """Serve a page from the cache, rendering it on the first hit.
+
+    When `validators` is given, conditional requests are answered with a 304
+    before anything is rendered, even if the page is not cached yet. Requests
+    for hosts outside `PAGE_CACHE_HOSTS` are rendered and never cached.
+
+    Cache hits and 304s are answered on the event loop; rendering and
+    compressing a page run in the threadpool, so a cold page doesn't stall
+    the other requests.
+
+    Args:
+        request: Incoming request, used for the cache key and passed to `render`.
+        key: Unique name of the page (e.g. `post_detail:<slug>`).
+        render: Callable producing the response from `request` on a cache miss.
+        validators: Callable returning the validators of the page sources.
+
+    Returns:
+        The negotiated cached variant, or a 304 response.
+    """
+    # Page kind without the slug, to keep the metric series count bounded.
+    page_name = key.split(":", 1)[0]
+    if not is_cacheable_host(request):
+        return await run_in_threadpool(_render_uncached, request, render, page_name)
+    cache_key = (str(request.base_url), key)
+    page = _pages.get(cache_key)
+    if page is None:
+        page_validators = validators() if validators else None
+        etag = None
+        if page_validators is not None:
+            etag = _page_etag(request, key, page_validators)
+            encodings = ("identity", *get_available_encoders())
+            not_modified = _not_modified_response(
+                request, etag, page_validators.last_modified, encodings
+            )
+            if not_modified is not None:
+                return not_modified
+        page = await run_in_threadpool(
+            _render_page, request, render, page_name, etag, page_validators
+        )
+        _pages.put(cache_key, page)
+    elif page.status_code == status.HTTP_200_OK:
+        not_modified = _not_modified_response(
+            request, page.etag, page.last_modified, page.variants.keys()
+        )
+        if not_modified is not None:
+            return not_modified
+    return cached_page_response(request, page)
+
+
+def cached_page_response(request: Request, page: CachedPage) -> Response:
+    encoding = negotiate_encoding(
+        request.headers.get("Accept-Encoding"), page.variants.keys()
+    )
+    variant = page.variants[encoding]
+    return Response(
+        content=variant.body,
+        status_code=page.status_code,
+        headers=variant.headers,
+    )
+
+
+def clear_page_cache() -> None:
+    _pages.clear()
+    get_render_version.cache_clear()
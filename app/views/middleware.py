@@ -0,0 +1,53 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.metrics import observe
+
+# Methods labelled by name; any other (client-chosen) method is "other", to
+# keep the metric series count bounded.
+HTTP_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"}
+)
+
+
+def get_method_label(method: str) -> str:
+    return method if method in HTTP_METHODS else "other"
+
+
+class RequestDurationMiddleware:
+    """Observe the latency of every HTTP request in a histogram.
+
+    A plain ASGI middleware: unlike `@app.middleware("http")`, it doesn't wrap
+    the request and response in extra objects and tasks.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template (e.g. `/p/{slug}`) or mount point
+            # (`/static`), not by the requested path.
+            route = getattr(scope.get("route"), "path", None)
+            observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - start,
+                route=route or scope.get("root_path") or "unmatched",
+                method=get_method_label(scope["method"]),
+                status=str(status_code),
+            )
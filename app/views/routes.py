@@ -1,25 +1,93 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING, Any
 
 from fastapi import APIRouter, HTTPException, Request, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 
-from app.services.ansi import get_ansi_content
-from app.services.html import get_content
-from app.views.utils import is_cli_user_agent, render_ansi_template
+from app.config import (
+    BUILD_REPORT_FILE,
+    CONTENT_SNAPSHOT_FILE,
+    CONTENT_WATCH_INTERVAL,
+    METRICS_ENABLED,
+)
+from app.schemas import PageValidators
+from app.services.ansi import (
+    build_ansi_content,
+    downgrade_ansi,
+    get_ansi_content,
+    get_ansi_item,
+    get_ansi_template_context,
+    set_ansi_content,
+)
+from app.services.common import compute_digest
+from app.services.feeds import is_feed_format
+from app.services.html import build_content, get_content, get_item, set_content
+from app.services.metrics import (
+    PROMETHEUS_MEDIA_TYPE,
+    render_metrics,
+    reset_build_report,
+    write_build_report,
+)
+from app.services.search import MAX_QUERY_LENGTH
+from app.services.snapshot import load_snapshot
+from app.services.watcher import watch_content
+from app.views.cache import clear_page_cache, get_page_response
+from app.views.utils import (
+    get_color_system,
+    is_cli_user_agent,
+    render_ansi_template,
+    url_for,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from fastapi import FastAPI
 
+    from app.services.store import GeneratedFile
+    from app.types import ColorSystemName, FeedFormat, Section
+    from app.views.utils import ANSITemplateName
+
+
+async def rebuild_content() -> None:
+    # Build off the event loop, then swap both snapshots and drop the rendered
+    # pages in one step so no request sees a mix of old and new content.
+    reset_build_report()
+    content = await asyncio.to_thread(build_content)
+    ansi_content = await asyncio.to_thread(build_ansi_content)
+    set_content(content)
+    set_ansi_content(ansi_content)
+    clear_page_cache()
+    if BUILD_REPORT_FILE is not None:
+        write_build_report(BUILD_REPORT_FILE)
+
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    get_content()
-    get_ansi_content()
+    # Every server worker loads the prebuilt snapshot when there's a fresh
+    # one, instead of building the content again.
+    if CONTENT_SNAPSHOT_FILE is None or not load_snapshot(CONTENT_SNAPSHOT_FILE):
+        get_content()
+        get_ansi_content()
+        if BUILD_REPORT_FILE is not None:
+            write_build_report(BUILD_REPORT_FILE)
+    watcher = None
+    if CONTENT_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(
+            watch_content(rebuild_content, CONTENT_WATCH_INTERVAL)
+        )
     yield
+    if watcher is not None:
+        watcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await watcher
 
 
 router = APIRouter(
@@ -27,41 +95,189 @@ router = APIRouter(
     include_in_schema=False,
 )
 
-templates = Jinja2Templates(directory="app/templates/")
+# Explicit environment, so our `url_for()` (fingerprinted static paths) is
+# registered before Starlette's default one.
+_template_env = Environment(
+    loader=FileSystemLoader("app/templates/"), autoescape=select_autoescape()
+)
+_template_globals: dict[str, Any] = _template_env.globals
+_template_globals["url_for"] = url_for
+templates = Jinja2Templates(env=_template_env)
 
 
-def post_html_detail(request: Request, slug: str):
+def shared_validators() -> PageValidators:
     content = get_content()
-    post = content["posts"].get(slug)
-    if not post:
-        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    return PageValidators(
+        digest=content["digest"], last_modified=content["last_modified"]
+    )
+
+
+def list_validators(section: Section) -> PageValidators:
+    content = get_content()
+    items = content[section].values()
+    return PageValidators(
+        digest=compute_digest(content["digest"], *(item.digest for item in items)),
+        last_modified=max(
+            [content["last_modified"], *(item.last_modified for item in items)]
+        ),
+    )
+
+
+def list_page_validators(section: Section, page: int) -> PageValidators:
+    content = get_content()
+    listing = content["listings"][section]
+    items = [content[section][slug] for slug in listing[page - 1]]
+    return PageValidators(
+        # The page count matters too: it shows in the pagination links.
+        digest=compute_digest(
+            content["digest"], str(len(listing)), *(item.digest for item in items)
+        ),
+        last_modified=max(
+            [content["last_modified"], *(item.last_modified for item in items)]
+        ),
+    )
+
+
+def list_page_context(section: Section, page: int) -> dict:
+    content = get_content()
+    listing = content["listings"][section]
+    return {
+        "metadata": content["metadata"],
+        section: [content[section][slug] for slug in listing[page - 1]],
+        "page": page,
+        "page_count": len(listing),
+    }
+
+
+def has_list_page(section: Section, page: int) -> bool:
+    return 1 <= page <= len(get_content()["listings"][section])
+
+
+def site_validators() -> PageValidators:
+    posts, projects = list_validators("posts"), list_validators("projects")
+    return PageValidators(
+        digest=compute_digest(posts.digest, projects.digest),
+        last_modified=max(posts.last_modified, projects.last_modified),
+    )
+
+
+def html_detail_validators(section: Section, slug: str) -> PageValidators:
+    content = get_content()
+    item = content[section][slug]
+    return PageValidators(
+        digest=compute_digest(content["digest"], item.digest),
+        last_modified=max(content["last_modified"], item.last_modified),
+    )
+
+
+async def generated_file_response(
+    request: Request, key: str, get_file: Callable[[], GeneratedFile]
+) -> Response:
+    # Serialized when the content is built: only compressed on the first hit.
+    def validators() -> PageValidators:
+        file = get_file()
+        return PageValidators(digest=file.digest, last_modified=file.last_modified)
+
+    def render(_: Request) -> Response:
+        file = get_file()
+        return Response(file.body, media_type=file.media_type)
+
+    return await get_page_response(request, key, render, validators)
+
+
+def ansi_detail_validators(section: Section, slug: str) -> PageValidators:
+    item = get_ansi_content()[section][slug]
+    return PageValidators(digest=item.digest, last_modified=item.last_modified)
+
+
+def render_post_html_detail(request: Request, slug: str):
+    content = get_content()
+    post = get_item("posts", slug)
     context = {"metadata": content["metadata"], "post": post}
     return templates.TemplateResponse(request, "post_detail.html", context=context)
 
 
-def post_ansi_detail(slug: str):
-    content = get_ansi_content()
-    post = content["posts"].get(slug)
-    if not post:
+async def post_html_detail(request: Request, slug: str):
+    if slug not in get_content()["posts"]:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
-    return render_ansi_template("post_template", **post.model_dump())
+    return await get_page_response(
+        request,
+        f"post_detail:{slug}",
+        partial(render_post_html_detail, slug=slug),
+        partial(html_detail_validators, "posts", slug),
+    )
 
 
-def project_html_detail(request: Request, slug: str):
-    content = get_content()
-    project = content["projects"].get(slug)
-    if not project:
+def render_ansi_document(
+    template_name: ANSITemplateName,
+    context: dict,
+    color_system: ColorSystemName,
+) -> HTMLResponse:
+    if color_system == "none":
+        # Without colors the header image is just a wall of blocks.
+        context = {**context, "header": ""}
+    document = render_ansi_template(template_name, **context)
+    return HTMLResponse(downgrade_ansi(document, color_system))
+
+
+def render_post_ansi_detail(
+    _: Request, slug: str, color_system: ColorSystemName = "truecolor"
+):
+    post = get_ansi_item("posts", slug)
+    return render_ansi_document(
+        "post_template", get_ansi_template_context(post), color_system
+    )
+
+
+async def post_ansi_detail(request: Request, slug: str):
+    if slug not in get_ansi_content()["posts"]:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
+    color_system = get_color_system(request.query_params, request.headers)
+    return await get_page_response(
+        request,
+        f"post_ansi:{color_system}:{slug}",
+        partial(render_post_ansi_detail, slug=slug, color_system=color_system),
+        partial(ansi_detail_validators, "posts", slug),
+    )
+
+
+def render_project_html_detail(request: Request, slug: str):
+    content = get_content()
+    project = get_item("projects", slug)
     context = {"metadata": content["metadata"], "project": project}
     return templates.TemplateResponse(request, "project_detail.html", context)
 
 
-def project_ansi_detail(slug: str):
-    content = get_ansi_content()
-    project = content["projects"].get(slug)
-    if not project:
+async def project_html_detail(request: Request, slug: str):
+    if slug not in get_content()["projects"]:
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    return await get_page_response(
+        request,
+        f"project_detail:{slug}",
+        partial(render_project_html_detail, slug=slug),
+        partial(html_detail_validators, "projects", slug),
+    )
+
+
+def render_project_ansi_detail(
+    _: Request, slug: str, color_system: ColorSystemName = "truecolor"
+):
+    project = get_ansi_item("projects", slug)
+    return render_ansi_document(
+        "project_template", get_ansi_template_context(project), color_system
+    )
+
+
+async def project_ansi_detail(request: Request, slug: str):
+    if slug not in get_ansi_content()["projects"]:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
-    return render_ansi_template("project_template", **project.model_dump())
+    color_system = get_color_system(request.query_params, request.headers)
+    return await get_page_response(
+        request,
+        f"project_ansi:{color_system}:{slug}",
+        partial(render_project_ansi_detail, slug=slug, color_system=color_system),
+        partial(ansi_detail_validators, "projects", slug),
+    )
 
 
 def internal_exception(request: Request):
@@ -75,7 +291,7 @@ def internal_exception(request: Request):
     )
 
 
-def not_found_exception(request: Request):
+def render_not_found(request: Request):
     content = get_content()
     context = {"metadata": content["metadata"]}
     return templates.TemplateResponse(
@@ -86,8 +302,11 @@ def not_found_exception(request: Request):
     )
 
 
-@router.get("/", response_class=HTMLResponse)
-async def home(request: Request):
+async def not_found_exception(request: Request):
+    return await get_page_response(request, "not_found", render_not_found)
+
+
+def render_home(request: Request):
     content = get_content()
     context = {
         "metadata": content["metadata"],
@@ -97,44 +316,86 @@ async def home(request: Request):
     return templates.TemplateResponse(request, "homepage.html", context)
 
 
-@router.get("/p", response_class=HTMLResponse)
-async def post_list(request: Request):
-    content = get_content()
-    posts = list(content["posts"].values())
-    context = {
-        "metadata": content["metadata"],
-        "posts": posts,
-    }
+@router.get("/", response_class=HTMLResponse)
+async def home(request: Request):
+    return await get_page_response(request, "home", render_home, site_validators)
+
+
+def render_post_list(request: Request, page: int = 1):
+    context = list_page_context("posts", page)
     return templates.TemplateResponse(request, "post_list.html", context)
 
 
+@router.get("/p", response_class=HTMLResponse)
+async def post_list(request: Request, page: int = 1):
+    if not has_list_page("posts", page):
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    return await get_page_response(
+        request,
+        f"post_list:{page}",
+        partial(render_post_list, page=page),
+        partial(list_page_validators, "posts", page),
+    )
+
+
+def get_feed(section: Section, feed_format: FeedFormat) -> GeneratedFile:
+    return get_content()["feeds"][section][feed_format]
+
+
+async def feed_response(
+    request: Request, section: Section, feed_format: str
+) -> Response:
+    if not is_feed_format(feed_format):
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    return await generated_file_response(
+        request,
+        f"feed:{section}:{feed_format}",
+        partial(get_feed, section, feed_format),
+    )
+
+
+@router.get("/p/feed.{feed_format}")
+async def post_feed(request: Request, feed_format: str):
+    return await feed_response(request, "posts", feed_format)
+
+
 @router.get("/p/{slug}", response_class=HTMLResponse)
 async def post_detail(request: Request, slug: str):
     if is_cli_user_agent(str(request.headers.get("User-Agent"))):
-        return post_ansi_detail(slug)
-    return post_html_detail(request, slug)
+        return await post_ansi_detail(request, slug)
+    return await post_html_detail(request, slug)
 
 
-@router.get("/pr", response_class=HTMLResponse)
-async def project_list(request: Request):
-    content = get_content()
-    projects = list(content["projects"].values())
-    context = {
-        "metadata": content["metadata"],
-        "projects": projects,
-    }
+def render_project_list(request: Request, page: int = 1):
+    context = list_page_context("projects", page)
     return templates.TemplateResponse(request, "project_list.html", context)
 
 
+@router.get("/pr", response_class=HTMLResponse)
+async def project_list(request: Request, page: int = 1):
+    if not has_list_page("projects", page):
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    return await get_page_response(
+        request,
+        f"project_list:{page}",
+        partial(render_project_list, page=page),
+        partial(list_page_validators, "projects", page),
+    )
+
+
+@router.get("/pr/feed.{feed_format}")
+async def project_feed(request: Request, feed_format: str):
+    return await feed_response(request, "projects", feed_format)
+
+
 @router.get("/pr/{slug}", response_class=HTMLResponse)
 async def project_detail(request: Request, slug: str):
     if is_cli_user_agent(str(request.headers.get("User-Agent"))):
-        return project_ansi_detail(slug)
-    return project_html_detail(request, slug)
+        return await project_ansi_detail(request, slug)
+    return await project_html_detail(request, slug)
 
 
-@router.get("/author", response_class=HTMLResponse)
-async def author(request: Request):
+def render_author(request: Request):
     content = get_content()
     author = content["author"]
     context = {
@@ -142,3 +403,78 @@ async def author(request: Request):
         "author": author,
     }
     return templates.TemplateResponse(request, "author.html", context)
+
+
+@router.get("/author", response_class=HTMLResponse)
+async def author(request: Request):
+    return await get_page_response(request, "author", render_author, shared_validators)
+
+
+@router.get("/sitemap.xml")
+async def sitemap(request: Request):
+    return await generated_file_response(
+        request, "sitemap", lambda: get_content()["sitemap"]
+    )
+
+
+@router.get("/robots.txt", response_class=PlainTextResponse)
+async def robots(request: Request):
+    return await generated_file_response(
+        request, "robots", lambda: get_content()["robots"]
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Internal: disabled unless `METRICS_ENABLED`, and the reverse proxy
+    # doesn't expose this route either.
+    if not METRICS_ENABLED:
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+def search_results(query: str) -> list[dict]:
+    content = get_content()
+    return [
+        {"section": section, "item": content[section][slug]}
+        for section, slug in content["search"].search(query)
+        if slug in content[section]
+    ]
+
+
+def render_search_ansi(request: Request, query: str) -> HTMLResponse:
+    detail_routes = {"posts": "post_detail", "projects": "project_detail"}
+    results = [
+        {
+            "title": result["item"].title,
+            "reading_time": result["item"].reading_time,
+            "publish_date": result["item"].publish_date,
+            "url": request.url_for(
+                detail_routes[result["section"]], slug=result["item"].slug
+            ),
+        }
+        for result in search_results(query)
+    ]
+    color_system = get_color_system(request.query_params, request.headers)
+    context = {"query": query, "results": results}
+    return render_ansi_document("search_template", context, color_system)
+
+
+def render_search(request: Request, query: str):
+    content = get_content()
+    context = {
+        "metadata": content["metadata"],
+        "query": query,
+        "max_query_length": MAX_QUERY_LENGTH,
+        "results": search_results(query) if query else [],
+    }
+    return templates.TemplateResponse(request, "search.html", context)
+
+
+@router.get("/search", response_class=HTMLResponse)
+async def search(request: Request, q: str = ""):
+    # Results depend on the query string, so they bypass the page cache.
+    query = q.strip()[:MAX_QUERY_LENGTH]
+    if is_cli_user_agent(str(request.headers.get("User-Agent"))):
+        return render_search_ansi(request, query)
+    return render_search(request, query)
@@ -0,0 +1,96 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from app.views.utils import is_not_modified, negotiate_encoding, parse_accept_encoding
+
+ALL_ENCODINGS = ("zstd", "br", "gzip", "identity")
+
+
+def test_parse_accept_encoding_reads_qualities():
+    assert parse_accept_encoding("gzip, br;q=0.8, zstd ; q=0") == {
+        "gzip": 1.0,
+        "br": 0.8,
+        "zstd": 0.0,
+    }
+
+
+def test_parse_accept_encoding_normalizes_and_skips_empty_items():
+    assert parse_accept_encoding(" GZip ,, BR;Q=0.5,") == {"gzip": 1.0, "br": 0.5}
+
+
+def test_parse_accept_encoding_treats_invalid_quality_as_refused():
+    assert parse_accept_encoding("br;q=high") == {"br": 0.0}
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, "identity"),
+        ("", "identity"),
+        ("gzip", "gzip"),
+        # Equal qualities follow the server preference.
+        ("gzip, br, zstd", "zstd"),
+        ("gzip, br;q=0.5", "gzip"),
+        ("zstd;q=0, br", "br"),
+        ("*", "zstd"),
+        ("*;q=0.1, gzip", "gzip"),
+        ("*, zstd;q=0", "br"),
+        ("compress, deflate", "identity"),
+        ("gzip;q=0, br;q=0, zstd;q=0", "identity"),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header, ALL_ENCODINGS) == expected
+
+
+def test_negotiate_encoding_only_picks_available_variants():
+    assert negotiate_encoding("zstd, br", ("gzip", "identity")) == "identity"
+    assert negotiate_encoding("zstd, br;q=0.9, gzip", ("br", "gzip")) == "gzip"
+
+
+ETAGS = ('"abc-zstd"', '"abc-br"', '"abc"')
+LAST_MODIFIED = datetime(2025, 3, 1, 12, 0, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    ['"abc-br"', 'W/"abc-br"', '"other", W/"abc"', "*", ' "abc-zstd" '],
+)
+def test_is_not_modified_matches_etags_weakly(if_none_match):
+    assert is_not_modified({"If-None-Match": if_none_match}, ETAGS)
+
+
+@pytest.mark.parametrize("if_none_match", ['"other"', '"abc-gzip"', "abc", ""])
+def test_is_not_modified_rejects_other_etags(if_none_match):
+    assert not is_not_modified({"If-None-Match": if_none_match}, ETAGS)
+
+
+@pytest.mark.parametrize(
+    ("if_modified_since", "expected"),
+    [
+        ("Sat, 01 Mar 2025 12:00:00 GMT", True),
+        ("Sun, 02 Mar 2025 00:00:00 GMT", True),
+        ("Sat, 01 Mar 2025 11:59:59 GMT", False),
+        # Dates without a zone are taken as UTC.
+        ("Sat, 01 Mar 2025 12:00:00", True),
+        ("not a date", False),
+    ],
+)
+def test_is_not_modified_compares_modification_dates(if_modified_since, expected):
+    headers = {"If-Modified-Since": if_modified_since}
+    assert is_not_modified(headers, ETAGS, LAST_MODIFIED) is expected
+
+
+def test_is_not_modified_prefers_etags_over_dates():
+    headers = {
+        "If-None-Match": '"other"',
+        "If-Modified-Since": "Sun, 02 Mar 2025 00:00:00 GMT",
+    }
+    assert not is_not_modified(headers, ETAGS, LAST_MODIFIED)
+
+
+def test_is_not_modified_without_validators():
+    assert not is_not_modified({}, ETAGS, LAST_MODIFIED)
+    headers = {"If-Modified-Since": "Sun, 02 Mar 2025 00:00:00 GMT"}
+    assert not is_not_modified(headers, ETAGS)
@@ -1,7 +1,15 @@
 import re
+from collections.abc import Collection, Iterable, Mapping
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 from typing import Any, Literal
 
-from jinja2 import Template
+from jinja2 import Environment, pass_context
+from jinja2.runtime import Context
+from starlette.datastructures import URL
+
+from app.services.assets import get_static_path
+from app.types import ColorSystemName
 
 CLI_USER_AGENT_PATTERN = re.compile(r"\b(?:curl|httpie|wget)/[^\s]+\b", re.IGNORECASE)
 
@@ -29,16 +37,145 @@ PROJECT_ANSI_TEMPLATE = """
 {% if website %}\033[1;97mWebsite:\033[0m {{ website }}{% endif %}\n
 """
 
-ANSITemplateName = Literal["post_template", "project_template"]
+SEARCH_ANSI_TEMPLATE = """
+\033[1;97mSearch:\033[0m {{ query }}
+
+{% for result in results %}\033[1;97m{{ result.title }}\033[0m
+\033[90m{{ result.reading_time }}\t{{ result.publish_date }}\033[0m
+{{ result.url }}
+
+{% else %}Nothing found.\n
+{% endfor %}"""
+
+ANSITemplateName = Literal["post_template", "project_template", "search_template"]
+
+# Compiled once at import; rendering no longer parses the template source.
+_ansi_environment = Environment()
+ANSI_TEMPLATES = {
+    "post_template": _ansi_environment.from_string(POST_ANSI_TEMPLATE),
+    "project_template": _ansi_environment.from_string(PROJECT_ANSI_TEMPLATE),
+    "search_template": _ansi_environment.from_string(SEARCH_ANSI_TEMPLATE),
+}
+
+COLOR_SYSTEM_ALIASES: dict[str, ColorSystemName] = {
+    "truecolor": "truecolor",
+    "24bit": "truecolor",
+    "256": "256",
+    "8bit": "256",
+    "16": "standard",
+    "standard": "standard",
+    "none": "none",
+    "plain": "none",
+}
+COLOR_SYSTEM_QUERY_PARAM = "color"
+COLOR_SYSTEM_HEADER = "X-Color-System"
+
+# Server preference when the client accepts several encodings equally.
+ENCODING_PREFERENCE = ("zstd", "br", "gzip", "identity")
 
 
 def is_cli_user_agent(headers: str) -> bool:
     return bool(CLI_USER_AGENT_PATTERN.search(headers))
 
 
+def get_color_system(
+    query_params: Mapping[str, str], headers: Mapping[str, str]
+) -> ColorSystemName:
+    """Choose the ANSI color depth from `?color=` or the `X-Color-System` header.
+
+    Unknown or missing values fall back to truecolor.
+    """
+    value = query_params.get(COLOR_SYSTEM_QUERY_PARAM) or headers.get(
+        COLOR_SYSTEM_HEADER
+    )
+    return COLOR_SYSTEM_ALIASES.get((value or "").strip().lower(), "truecolor")
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Parse an `Accept-Encoding` header into encoding -> quality pairs."""
+    qualities: dict[str, float] = {}
+    for item in header.split(","):
+        encoding, _, params = item.strip().partition(";")
+        if not encoding:
+            continue
+        quality = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[encoding.strip().lower()] = quality
+    return qualities
+
+
+def negotiate_encoding(header: str | None, available: Iterable[str]) -> str:
+    """Pick the best available content encoding for an `Accept-Encoding` header.
+
+    Args:
+        header: Raw `Accept-Encoding` header, or None when it was not sent.
+        available: Encodings that have a precomputed variant.
+
+    Returns:
+        The chosen encoding token, falling back to `identity`.
+    """
+    if not header:
+        return "identity"
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = "identity", 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available or encoding == "identity":
+            continue
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_not_modified(
+    headers: Mapping[str, str],
+    etags: Collection[str],
+    last_modified: datetime | None = None,
+) -> bool:
+    """Evaluate `If-None-Match` / `If-Modified-Since` against page validators.
+
+    `If-None-Match` takes precedence and uses the weak comparison required for
+    GET requests. `If-Modified-Since` is only checked when it is absent.
+
+    Args:
+        headers: Request headers.
+        etags: Every ETag the page may have been served with.
+        last_modified: Last modification time of the page sources.
+
+    Returns:
+        True when the client copy is still fresh and a 304 can be sent.
+    """
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return not tags.isdisjoint(etags)
+    if_modified_since = headers.get("If-Modified-Since")
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    return last_modified <= since
+
+
 def render_ansi_template(template_name: ANSITemplateName, **context: Any):
-    if template_name == "post_template":
-        template = Template(POST_ANSI_TEMPLATE)
-    elif template_name == "project_template":
-        template = Template(PROJECT_ANSI_TEMPLATE)
-    return template.render(**context)
+    return ANSI_TEMPLATES[template_name].render(**context)
+
+
+@pass_context
+def url_for(context: Context, name: str, /, **path_params: Any) -> URL:
+    """Template `url_for()` that points static files at their fingerprinted name."""
+    if name == "static":
+        path_params["path"] = get_static_path(str(path_params["path"]))
+    return context["request"].url_for(name, **path_params)
@@ -0,0 +1,433 @@
+"""Benchmark the content pipeline and the hot routes on synthetic corpora.
+
+Usage:
+    python -m cli.benchmark [--sizes 10 1000 10000] [--output FILE]
+
+For every corpus size a synthetic `content/` tree is generated (posts with
+code blocks, images and a few very long bodies) and measured in a fresh
+process, because content paths are read from the environment at import time:
+
+- the application startup (`lifespan`) and its build stages with an empty
+  build cache, again in a second process reusing the persistent build cache
+  (warm restart), and `build_content()` / `build_ansi_content()` without any
+  change (incremental);
+- `_parse_markdown()`, `render_markdown_to_ansi()` and the ANSI image encoder;
+- every route, loaded in-process through the ASGI app.
+
+Results are written as JSON (default: `.cache/benchmarks/<timestamp>.json`).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from cli.config import BENCHMARKS_DIR, HEADERS_DIR, IMAGES_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10, 1_000, 10_000)
+# Synthetic posts are named `bench-post-NNNNN` so their copied images can be
+# removed from the static directory afterwards.
+POST_PREFIX = "bench-post-"
+# Every `IMAGE_EVERY`-th post ships an image, every `LONG_EVERY`-th post has a
+# body `LONG_FACTOR` times longer than the others.
+IMAGE_EVERY = 10
+LONG_EVERY = 100
+LONG_FACTOR = 20
+PROJECTS = 10
+
+_REAL_CONTENT_DIR = Path(__file__).parent.parent / "content"
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam "
+    "quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo"
+).split()
+
+CODE_BLOCKS = (
+    (
+        "python",
+        "def factorial(n: int) -> int:\n"
+        "    if n <= 1:\n"
+        "        return 1\n"
+        "    return n * factorial(n - 1)\n",
+    ),
+    (
+        "js",
+        "const factorial = (n) => {\n"
+        "  if (n <= 1) return 1;\n"
+        "  return n * factorial(n - 1);\n"
+        "};\n",
+    ),
+    (
+        "rust",
+        "fn factorial(n: u64) -> u64 {\n    (1..=n).product()\n}\n",
+    ),
+)
+
+
+def _paragraph(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(60, 120))
+    return " ".join(words).capitalize() + "."
+
+
+def _post_body(rng: random.Random, sections: int, image: str | None) -> str:
+    parts = []
+    for section in range(sections):
+        parts.append(f"## Section {section + 1}")
+        parts.append(_paragraph(rng))
+        language, code = rng.choice(CODE_BLOCKS)
+        parts.append(f"```{language}\n{code}```")
+        parts.append("\n".join(f"- {_paragraph(rng)[:60]}" for _ in range(3)))
+        parts.append(f"> {_paragraph(rng)[:120]}")
+        parts.append(f"See [the docs](https://example.com/{section}).")
+    if image:
+        parts.insert(2, f"![figure](images/{image})")
+    return "\n\n".join(parts)
+
+
+def generate_corpus(root: Path, posts: int, seed: int = 0) -> None:
+    """Write a synthetic `content/` tree with `posts` posts under `root`.
+
+    Args:
+        root: Destination directory (becomes `CONTENT_DIR`).
+        posts: Number of posts to generate.
+        seed: Seed of the random generator, for reproducible corpora.
+    """
+    rng = random.Random(seed)
+    for name in ("meta.md", "homepage.md"):
+        shutil.copy(_REAL_CONTENT_DIR / name, root / name)
+    shutil.copytree(_REAL_CONTENT_DIR / "author", root / "author")
+    image_source = _REAL_CONTENT_DIR / "author" / "picture.jpeg"
+    for section in ("posts", "projects"):
+        (root / section).mkdir()
+    for number in range(posts):
+        post_dir = root / "posts" / f"{POST_PREFIX}{number:05d}"
+        post_dir.mkdir()
+        image = None
+        if number % IMAGE_EVERY == 0:
+            (post_dir / "images").mkdir()
+            image = "figure.jpeg"
+            shutil.copy(image_source, post_dir / "images" / image)
+        sections = 3 * (LONG_FACTOR if number % LONG_EVERY == 0 else 1)
+        front_matter = (
+            f"---\ntitle: Post {number} {' '.join(rng.choices(WORDS, k=3))}\n"
+            f"date: {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2025\n"
+            "topic: benchmark\n---\n\n"
+        )
+        body = _post_body(rng, sections, image)
+        (post_dir / "index.md").write_text(front_matter + body, encoding="utf-8")
+    for number in range(PROJECTS):
+        front_matter = (
+            f"---\ntitle: Project {number}\n"
+            "repository: https://github.com/luovkle/luovkle.com\n---\n\n"
+        )
+        body = _post_body(rng, 3, None)
+        (root / "projects" / f"project-{number}.md").write_text(
+            front_matter + body, encoding="utf-8"
+        )
+
+
+def remove_copied_images() -> None:
+    """Remove the images of synthetic posts copied into the static directory."""
+    posts_dir = IMAGES_DIR / "posts"
+    for path in posts_dir.glob(f"{POST_PREFIX}*"):
+        shutil.rmtree(path)
+    if posts_dir.is_dir() and not any(posts_dir.iterdir()):
+        posts_dir.rmdir()
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Summarize durations (in seconds) as milliseconds."""
+    ordered = sorted(samples)
+    percentiles = (
+        statistics.quantiles(ordered, n=100, method="inclusive")
+        if len(ordered) > 1
+        else ordered * 99
+    )
+    return {
+        "n": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def time_once(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def benchmark_incremental_builds() -> dict[str, float]:
+    from app.services.ansi import build_ansi_content
+    from app.services.html import build_content
+
+    # Nothing changed since startup: every item comes from the item caches.
+    return {
+        "build_content_ms": time_once(build_content),
+        "build_ansi_content_ms": time_once(build_ansi_content),
+    }
+
+
+def benchmark_renderers(repeat: int) -> dict[str, Any]:
+    from app.config import POSTS_CONTENT_DIR
+    from app.services.ansi import render_markdown_to_ansi
+    from app.services.common import get_content_context, load_markdown_content
+    from app.services.html import _parse_markdown
+
+    # The longest post is the worst case for both renderers.
+    contexts = [
+        get_content_context(path) for path in sorted(POSTS_CONTENT_DIR.iterdir())
+    ]
+    context = max(contexts, key=lambda context: context.index_file.stat().st_size)
+    body = load_markdown_content(context.index_file).body or ""
+    results: dict[str, Any] = {
+        "body_chars": len(body),
+        "parse_markdown": time_call(lambda: _parse_markdown(context, body), repeat),
+        "render_markdown_to_ansi": time_call(
+            lambda: render_markdown_to_ansi(body), repeat
+        ),
+    }
+    try:
+        from PIL import Image
+
+        from cli.img_to_ansi import image_to_ansi_lines
+    except ImportError:
+        # Pillow is only installed with the `build` dependency group.
+        results["img_to_ansi"] = None
+        return results
+    with Image.open(sorted(HEADERS_DIR.glob("cover_*.png"))[0]) as header:
+        header.load()
+        results["img_to_ansi"] = time_call(lambda: image_to_ansi_lines(header), repeat)
+    return results
+
+
+async def _load_route(
+    client: Any, path: str, headers: dict[str, str], requests: int, concurrency: int
+) -> dict[str, Any]:
+    # The first request renders the page; the rest are served from the cache.
+    start = time.perf_counter()
+    response = await client.get(path, headers=headers)
+    first_ms = (time.perf_counter() - start) * 1000
+    samples: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await client.get(path, headers=headers)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "status": response.status_code,
+        "first_ms": first_ms,
+        "requests_per_second": requests / elapsed,
+        **summarize(samples),
+    }
+
+
+async def benchmark_routes(requests: int, concurrency: int) -> dict[str, Any]:
+    import httpx
+
+    from app.main import app
+    from app.services.html import get_content
+
+    content = get_content()
+    post = next(iter(content["posts"]), "missing")
+    project = next(iter(content["projects"]), "missing")
+    browser = {"Accept-Encoding": "gzip, br, zstd"}
+    cli = {"User-Agent": "curl/8.0.0"}
+    routes = {
+        "/": ("/", browser),
+        "/p": ("/p", browser),
+        "/pr": ("/pr", browser),
+        "/author": ("/author", browser),
+        "/p/{slug}": (f"/p/{post}", browser),
+        "/p/{slug} (ansi)": (f"/p/{post}", cli),
+        "/pr/{slug}": (f"/pr/{project}", browser),
+        "/pr/{slug} (ansi)": (f"/pr/{project}", cli),
+        "/p/feed.atom": ("/p/feed.atom", browser),
+        "/sitemap.xml": ("/sitemap.xml", browser),
+        "/search": ("/search?q=lorem+dolor", browser),
+        "/search (ansi)": ("/search?q=lorem+dolor", cli),
+        "404": ("/missing-page", browser),
+    }
+    transport = httpx.ASGITransport(app=app)
+    results: dict[str, Any] = {}
+    # A host in the default `PAGE_CACHE_HOSTS`, so pages are served from cache.
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://localhost:4000"
+    ) as client:
+        for name, (path, headers) in routes.items():
+            results[name] = await _load_route(
+                client, path, headers, requests, concurrency
+            )
+    return results
+
+
+def run_corpus(args: argparse.Namespace) -> dict[str, Any]:
+    """Measure the current `CONTENT_DIR` (runs in a child process)."""
+    from app.main import app
+    from app.services.metrics import get_build_report
+
+    async def run_app() -> dict[str, Any]:
+        # Startup builds both content snapshots, so it's timed first while
+        # every in-memory cache is still empty.
+        start = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            results: dict[str, Any] = {
+                "lifespan_startup_ms": (time.perf_counter() - start) * 1000,
+                "build_stages_ms": {
+                    stage: seconds * 1000
+                    for stage, seconds in get_build_report()["stages"].items()
+                },
+            }
+            if not args.builds_only:
+                results["routes"] = await benchmark_routes(
+                    args.requests, args.concurrency
+                )
+        return results
+
+    results = asyncio.run(run_app())
+    if not args.builds_only:
+        results["incremental_builds"] = benchmark_incremental_builds()
+        results["renderers"] = benchmark_renderers(args.repeat)
+    return results
+
+
+def _run_child(
+    corpus_dir: Path, cache_dir: Path, args: argparse.Namespace, builds_only: bool
+) -> dict[str, Any]:
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        command = [
+            sys.executable,
+            "-m",
+            "cli.benchmark",
+            "--corpus",
+            str(corpus_dir),
+            "--output",
+            output.name,
+            "--repeat",
+            str(args.repeat),
+            "--requests",
+            str(args.requests),
+            "--concurrency",
+            str(args.concurrency),
+        ]
+        if builds_only:
+            command.append("--builds-only")
+        env = {
+            **os.environ,
+            "CONTENT_DIR": str(corpus_dir),
+            "BUILD_CACHE_DIR": str(cache_dir),
+            "CONTENT_WATCH_INTERVAL": "0",
+        }
+        subprocess.run(command, env=env, check=True)
+        return json.loads(Path(output.name).read_text(encoding="utf-8"))
+
+
+def get_environment() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "build_workers": os.getenv("BUILD_WORKERS", "1"),
+        "lazy_rendering": os.getenv("LAZY_RENDERING", "0") == "1",
+    }
+
+
+def run_benchmarks(args: argparse.Namespace) -> dict[str, Any]:
+    results: dict[str, Any] = {"environment": get_environment(), "corpora": {}}
+    for size in args.sizes:
+        logger.info("Benchmarking a corpus of %d posts", size)
+        with tempfile.TemporaryDirectory(prefix="luovkle-bench-") as tmp:
+            corpus_dir, cache_dir = Path(tmp) / "content", Path(tmp) / "cache"
+            corpus_dir.mkdir()
+            start = time.perf_counter()
+            generate_corpus(corpus_dir, size, args.seed)
+            generation_ms = (time.perf_counter() - start) * 1000
+            try:
+                cold = _run_child(corpus_dir, cache_dir, args, builds_only=False)
+                warm = _run_child(corpus_dir, cache_dir, args, builds_only=True)
+            finally:
+                remove_copied_images()
+        results["corpora"][str(size)] = {
+            "generation_ms": generation_ms,
+            "cold_cache": cold,
+            "warm_restart": warm,
+        }
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", type=Path)
+    # Internal: measure an existing corpus in this process.
+    parser.add_argument("--corpus", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--builds-only", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # httpx logs every request of the load test at INFO.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    args = parse_args()
+    if args.corpus is not None:
+        results = run_corpus(args)
+    else:
+        results = run_benchmarks(args)
+    output = args.output or BENCHMARKS_DIR / (
+        datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.corpus is None:
+        logger.info("Results written to %s", output)
+
+
+if __name__ == "__main__":
+    main()
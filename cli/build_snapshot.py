@@ -0,0 +1,14 @@
+from app.config import CONTENT_SNAPSHOT_FILE
+from app.services.snapshot import write_snapshot
+
+
+def main() -> None:
+    # Build the content once (e.g. at image build time); every server worker
+    # then loads the snapshot at startup instead of rebuilding it.
+    if CONTENT_SNAPSHOT_FILE is None:
+        raise SystemExit("CONTENT_SNAPSHOT_FILE is empty, snapshots are disabled")
+    write_snapshot(CONTENT_SNAPSHOT_FILE)
+
+
+if __name__ == "__main__":
+    main()
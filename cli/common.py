@@ -1,11 +1,15 @@
 import asyncio
-from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor
+import re
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Literal
 
 OutputFileExtension = Literal[".ansi", ".webp", ".avif"]
 
+# Copies made by `cli.fingerprint_assets` (`<stem>.<hash><suffix>`)
+FINGERPRINTED_NAME_PATTERN = re.compile(r"\.[0-9a-f]{12}\.[^.]+$")
+
 
 def get_input_paths(images_dir: Path) -> list[Path]:
     """Return all `.png` and `.jpeg` image paths within a directory.
@@ -19,7 +23,11 @@ def get_input_paths(images_dir: Path) -> list[Path]:
     patterns = ("**/*.png", "**/*.jpeg")
     paths = []
     for pattern in patterns:
-        paths.extend(list(images_dir.glob(pattern)))
+        paths.extend(
+            path
+            for path in images_dir.glob(pattern)
+            if not FINGERPRINTED_NAME_PATTERN.search(path.name)
+        )
     return paths
 
 
@@ -45,17 +53,25 @@ def get_output_paths(
     return output_paths
 
 
-async def run_blocking_tasks_in_threads(
-    funcs_and_args: list[tuple[Callable, tuple]],
-) -> None:
-    """Execute blocking functions concurrently using threads.
+async def run_blocking_tasks_in_processes(
+    funcs_and_args: Sequence[tuple[Callable, tuple]],
+) -> list:
+    """Execute CPU-bound functions in parallel using worker processes.
+
+    Functions and arguments must be picklable (module-level functions).
 
     Args:
-        funcs_and_args (list[tuple[Callable, tuple]]): List of (function, args) pairs.
+        funcs_and_args (Sequence[tuple[Callable, tuple]]): (function, args)
+            pairs.
+
+    Returns:
+        list: Return values, in the order of `funcs_and_args`.
     """
+    if not funcs_and_args:
+        return []
     loop = asyncio.get_running_loop()
-    with ThreadPoolExecutor() as executor:
+    with ProcessPoolExecutor() as executor:
         tasks = [
             loop.run_in_executor(executor, func, *args) for func, args in funcs_and_args
         ]
-        await asyncio.gather(*tasks, return_exceptions=False)
+        return await asyncio.gather(*tasks, return_exceptions=False)
@@ -11,6 +11,19 @@ _ANSI_DIR = _BASE_DIR / "app" / "ansi"
 IMAGES_DIR = STATIC_DIR / "images"
 HEADERS_DIR = IMAGES_DIR / "headers"
 
+# Responsive image variants: target widths and the manifest describing them
+RESPONSIVE_WIDTHS = (320, 640, 960)
+IMAGES_MANIFEST_FILE = IMAGES_DIR / "manifest.json"
+
+# Content-addressed cache of converted images, keyed by source and settings
+IMAGES_CACHE_DIR = _BASE_DIR / ".cache" / "images"
+
+# Results of `python -m cli.benchmark`
+BENCHMARKS_DIR = _BASE_DIR / ".cache" / "benchmarks"
+
+# Output directory for the static export of the site
+EXPORT_DIR = _BASE_DIR / "dist"
+
 # Directories for ansi images
 ANSI_IMAGES_DIR = _ANSI_DIR / "images"
 ANSI_HEADERS_DIR = ANSI_IMAGES_DIR / "headers"
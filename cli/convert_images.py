@@ -1,78 +1,252 @@
+import argparse
 import asyncio
+import filecmp
+import hashlib
+import json
+import os
+import shutil
 from pathlib import Path
+from typing import TypedDict
 
+import PIL
 from PIL import Image
 
-from cli.common import get_input_paths, get_output_paths, run_blocking_tasks_in_threads
-from cli.config import IMAGES_DIR
+from cli.common import get_input_paths, run_blocking_tasks_in_processes
+from cli.config import (
+    ANSI_HEADERS_DIR,
+    HEADERS_DIR,
+    IMAGES_CACHE_DIR,
+    IMAGES_DIR,
+    IMAGES_MANIFEST_FILE,
+    RESPONSIVE_WIDTHS,
+    STATIC_DIR,
+)
+from cli.img_to_ansi import image_to_ansi_lines
 
+# Encoder settings per output format, in the order browsers should prefer them.
+# They are part of the conversion key: changing any of them re-encodes every
+# image on the next run.
+ENCODER_SETTINGS: dict[str, dict] = {
+    ".avif": {
+        "format": "AVIF",
+        "quality": 90,
+        "chroma_subsampling": "444",
+        "range": "full",
+        "speed": 4,
+    },
+    ".webp": {"format": "WEBP", "lossless": True},
+}
+
+
+class ANSISettings(TypedDict):
+    """Keyword arguments of `image_to_ansi_lines()`."""
+
+    width: int
+    half_blocks: bool
+
+
+ANSI_SETTINGS: ANSISettings = {"width": 79, "half_blocks": False}
+
+# Bump to invalidate every cached conversion after changing this module.
+PIPELINE_VERSION = 1
+
+# Metadata stored with each cached conversion
+META_FILENAME = "meta.json"
+
+
+def get_variant_path(input_path: Path, extension: str, width: int | None) -> Path:
+    """Build the path of a converted image, optionally resized to `width`.
+
+    Args:
+        input_path (Path): Source image path.
+        extension (str): Output file extension (e.g. `.webp`).
+        width (int | None): Target width, or None for the full-size variant.
+
+    Returns:
+        Path: `<stem>.<ext>` or `<stem>-<width>w.<ext>` next to the source.
+    """
+    suffix = f"-{width}w" if width else ""
+    return input_path.with_name(f"{input_path.stem}{suffix}{extension}")
 
-def img_to_webp(
-    input_path: Path,
-    output_path: Path,
-    force_overwrite: bool = False,
-    save_if_smaller: bool = True,
-) -> None:
-    """Convert an image to lossless WebP format.
+
+def get_conversion_key(input_path: Path, ansi_settings: ANSISettings | None) -> str:
+    """Hash a source image together with everything its outputs depend on.
 
     Args:
         input_path (Path): Source image path.
-        output_path (Path): Output `.webp` path.
-        force_overwrite (bool, optional): Overwrite if exists. Defaults to False.
-        save_if_smaller (bool, optional): Keep if smaller. Defaults to True.
+        ansi_settings (ANSISettings | None): Settings of the ANSI rendition, or
+            None if the image has none.
+
+    Returns:
+        str: Hex digest identifying the conversion.
     """
-    if not force_overwrite and output_path.exists():
-        return None
-    img = Image.open(input_path).convert("RGBA")
-    img.save(output_path, format="WEBP", lossless=True)
-    if save_if_smaller and output_path.stat().st_size >= input_path.stat().st_size:
-        output_path.unlink()
-
-
-def img_to_avif(
-    input_path: Path,
-    output_path: Path,
-    force_overwrite: bool = False,
-    save_if_smaller: bool = True,
+    settings = {
+        "pipeline": PIPELINE_VERSION,
+        "pillow": PIL.__version__,
+        "widths": RESPONSIVE_WIDTHS,
+        "encoders": ENCODER_SETTINGS,
+        "ansi": ansi_settings,
+    }
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    digest.update(input_path.read_bytes())
+    return digest.hexdigest()
+
+
+def get_cache_entry_dir(key: str) -> Path:
+    return IMAGES_CACHE_DIR / key[:2] / key
+
+
+def convert_image(
+    input_path: Path, entry_dir: Path, ansi_settings: ANSISettings | None
 ) -> None:
-    """Convert an image to high-quality AVIF format.
+    """Encode every output of a source image into a cache entry.
+
+    The source is decoded once; each responsive width is resized once and
+    encoded to every format. Full-size variants that are not smaller than the
+    source are dropped. Runs in a worker process.
 
     Args:
         input_path (Path): Source image path.
-        output_path (Path): Output `.avif` path.
-        force_overwrite (bool, optional): Overwrite if exists. Defaults to False.
-        save_if_smaller (bool, optional): Keep if smaller. Defaults to True.
+        entry_dir (Path): Cache entry directory to create.
+        ansi_settings (ANSISettings | None): Also render the image as ANSI art,
+            with these settings.
     """
-    if not force_overwrite and output_path.exists():
-        return None
-    img = Image.open(input_path).convert("RGBA")
-    img.save(
-        output_path,
-        format="AVIF",
-        quality=90,
-        chroma_subsampling="444",
-        range="full",
-        speed=4,
-    )
-    if save_if_smaller and output_path.stat().st_size >= input_path.stat().st_size:
-        output_path.unlink()
+    tmp_dir = entry_dir.with_name(f"{entry_dir.name}.tmp-{os.getpid()}")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    source_size = input_path.stat().st_size
+    with Image.open(input_path) as source:
+        img = source.convert("RGBA")
+    width, height = img.size
+    variants: dict[str, list[dict]] = {}
+    for variant_width in [None, *(w for w in RESPONSIVE_WIDTHS if w < width)]:
+        resized = img
+        if variant_width:
+            variant_height = round(height * variant_width / width)
+            resized = img.resize(
+                (variant_width, variant_height), Image.Resampling.LANCZOS
+            )
+        for extension, settings in ENCODER_SETTINGS.items():
+            name = get_variant_path(input_path, extension, variant_width).name
+            output_path = tmp_dir / name
+            resized.save(output_path, **settings)
+            if not variant_width and output_path.stat().st_size >= source_size:
+                output_path.unlink()
+                continue
+            variants.setdefault(extension.removeprefix("."), []).append(
+                {"name": name, "width": variant_width or width}
+            )
+    ansi = None
+    if ansi_settings is not None:
+        ansi = f"{input_path.stem}.ansi"
+        lines = image_to_ansi_lines(img, **ansi_settings)
+        (tmp_dir / ansi).write_text("\n".join(lines))
+    meta = {"width": width, "height": height, "variants": variants, "ansi": ansi}
+    (tmp_dir / META_FILENAME).write_text(json.dumps(meta), encoding="utf-8")
+    # Publish the entry atomically; another run may have produced it already.
+    try:
+        tmp_dir.rename(entry_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir)
+
+
+def _copy_if_changed(source: Path, destination: Path) -> None:
+    if destination.is_file() and filecmp.cmp(source, destination, shallow=False):
+        return
+    shutil.copyfile(source, destination)
+
+
+def publish_outputs(input_path: Path, entry_dir: Path, meta: dict) -> None:
+    """Copy the outputs of a cache entry next to the source (and the ANSI dir).
+
+    Args:
+        input_path (Path): Source image path.
+        entry_dir (Path): Cache entry directory.
+        meta (dict): Metadata of the cache entry.
+    """
+    for entries in meta["variants"].values():
+        for entry in entries:
+            name = entry["name"]
+            _copy_if_changed(entry_dir / name, input_path.with_name(name))
+    if meta["ansi"]:
+        ANSI_HEADERS_DIR.mkdir(parents=True, exist_ok=True)
+        _copy_if_changed(entry_dir / meta["ansi"], ANSI_HEADERS_DIR / meta["ansi"])
+
+
+def write_manifest(metas: dict[Path, dict], manifest_file: Path) -> None:
+    """Record intrinsic dimensions and available variants of every image.
+
+    The manifest maps each source path (relative to the static directory) to
+    its width, height and, per format, the variant files with their widths.
+
+    Args:
+        metas (dict[Path, dict]): Conversion metadata keyed by source path.
+        manifest_file (Path): Destination `.json` file.
+    """
+    manifest = {}
+    for input_path, meta in sorted(metas.items()):
+        variants = {
+            suffix: sorted(
+                (
+                    {
+                        "path": input_path.with_name(entry["name"])
+                        .relative_to(STATIC_DIR)
+                        .as_posix(),
+                        "width": entry["width"],
+                    }
+                    for entry in entries
+                ),
+                key=lambda entry: entry["width"],
+            )
+            for suffix, entries in meta["variants"].items()
+        }
+        manifest[input_path.relative_to(STATIC_DIR).as_posix()] = {
+            "width": meta["width"],
+            "height": meta["height"],
+            "variants": variants,
+        }
+    manifest_file.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+async def main(half_blocks: bool = ANSI_SETTINGS["half_blocks"]) -> None:
+    ansi_settings = ANSISettings(width=ANSI_SETTINGS["width"], half_blocks=half_blocks)
+    # Headers are also rendered as ANSI art for CLI user agents.
+    settings = {
+        input_path: ansi_settings if input_path.parent == HEADERS_DIR else None
+        for input_path in get_input_paths(IMAGES_DIR)
+    }
+    entry_dirs = {
+        input_path: get_cache_entry_dir(get_conversion_key(input_path, ansi))
+        for input_path, ansi in settings.items()
+    }
+    # Encode only the images whose source or settings changed.
+    tasks = [
+        (convert_image, (input_path, entry_dir, settings[input_path]))
+        for input_path, entry_dir in entry_dirs.items()
+        if not (entry_dir / META_FILENAME).is_file()
+    ]
+    await run_blocking_tasks_in_processes(tasks)
+    metas = {}
+    for input_path, entry_dir in entry_dirs.items():
+        meta = json.loads((entry_dir / META_FILENAME).read_text(encoding="utf-8"))
+        publish_outputs(input_path, entry_dir, meta)
+        metas[input_path] = meta
+    write_manifest(metas, IMAGES_MANIFEST_FILE)
 
 
-async def main() -> None:
-    input_paths = get_input_paths(IMAGES_DIR)
-    # Convert to WebP
-    webp_io_paths = zip(
-        input_paths, get_output_paths(input_paths, ".webp"), strict=False
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Convert the static images and render the headers as ANSI art."
     )
-    tasks = [(img_to_webp, io_paths) for io_paths in webp_io_paths]
-    await run_blocking_tasks_in_threads(tasks)
-    # Convert to AVIF
-    avif_io_paths = zip(
-        input_paths, get_output_paths(input_paths, ".avif"), strict=False
+    parser.add_argument(
+        "--half-blocks",
+        action="store_true",
+        help="render the ANSI headers with upper half blocks, doubling their "
+        "vertical resolution",
     )
-    tasks = [(img_to_avif, io_paths) for io_paths in avif_io_paths]
-    await run_blocking_tasks_in_threads(tasks)
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    asyncio.run(main(args.half_blocks))
@@ -0,0 +1,115 @@
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from fastapi import Request
+
+from app.main import app
+from app.services.ansi import get_ansi_content
+from app.services.common import SECTION_PATHS
+from app.services.compression import EXPORT_LEVELS, compress_variants
+from app.services.html import get_content
+from app.views import routes
+from cli.config import EXPORT_DIR
+
+# File suffixes expected by Caddy's `file_server { precompressed }`
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br", "zstd": ".zst"}
+
+
+def build_request(base_url: str) -> Request:
+    """Build a request equivalent to one received at `base_url`.
+
+    Templates resolve `url_for()` against the request, so the exported pages
+    carry the same absolute URLs as the ones served by the application.
+
+    Args:
+        base_url (str): Public URL of the site (e.g. `https://luovkle.com`).
+
+    Returns:
+        Request: A GET request for the site root.
+    """
+    parts = urlsplit(base_url)
+    https = parts.scheme == "https"
+    host = parts.hostname or "localhost"
+    port = parts.port or (443 if https else 80)
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "scheme": parts.scheme or "http",
+            "server": (host, port),
+            "path": "/",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", parts.netloc.encode("latin-1"))],
+            "app": app,
+            "router": app.router,
+        }
+    )
+
+
+def write_page(output_path: Path, body: bytes) -> None:
+    """Write a page and its precompressed variants next to it.
+
+    Args:
+        output_path (Path): Destination of the uncompressed page.
+        body (bytes): Rendered page.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    for encoding, encoded_body in compress_variants(body, EXPORT_LEVELS).items():
+        suffix = ENCODING_SUFFIXES.get(encoding, "")
+        output_path.with_name(output_path.name + suffix).write_bytes(encoded_body)
+
+
+def export_site(output_dir: Path) -> int:
+    """Render every route served by the router into `output_dir`.
+
+    Layout: `<path>/index.html` for HTML pages, `<path>/index.ansi` for the
+    truecolor documents sent to CLI user agents, plus `404.html` and
+    `500.html`. The feeds (`p/feed.<format>`, `pr/feed.<format>`),
+    `sitemap.xml` and `robots.txt` are written as built with the content.
+
+    Args:
+        output_dir (Path): Root of the exported site.
+
+    Returns:
+        int: Number of pages and documents written.
+    """
+    content, ansi_content = get_content(), get_ansi_content()
+    request = build_request(str(content["metadata"]["og_url"]))
+    pages = {
+        "index.html": routes.render_home(request),
+        "p/index.html": routes.render_post_list(request),
+        "pr/index.html": routes.render_project_list(request),
+        "author/index.html": routes.render_author(request),
+        "404.html": routes.render_not_found(request),
+        "500.html": routes.internal_exception(request),
+    }
+    for slug in content["posts"]:
+        pages[f"p/{slug}/index.html"] = routes.render_post_html_detail(request, slug)
+    for slug in ansi_content["posts"]:
+        pages[f"p/{slug}/index.ansi"] = routes.render_post_ansi_detail(request, slug)
+    for slug in content["projects"]:
+        pages[f"pr/{slug}/index.html"] = routes.render_project_html_detail(
+            request, slug
+        )
+    for slug in ansi_content["projects"]:
+        pages[f"pr/{slug}/index.ansi"] = routes.render_project_ansi_detail(
+            request, slug
+        )
+    documents = {"sitemap.xml": content["sitemap"], "robots.txt": content["robots"]}
+    for section, path in SECTION_PATHS.items():
+        for feed_format, feed in content["feeds"][section].items():
+            documents[f"{path}/feed.{feed_format}"] = feed
+    for relative_path, response in pages.items():
+        write_page(output_dir / relative_path, bytes(response.body))
+    for relative_path, document in documents.items():
+        write_page(output_dir / relative_path, document.body)
+    return len(pages) + len(documents)
+
+
+def main() -> None:
+    export_site(EXPORT_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+from app.services.assets import build_asset_manifest
+
+
+def main() -> None:
+    # Copy each static asset to `<stem>.<hash><suffix>` and record the mapping
+    # in the assets manifest, which templates resolve `url_for()` through.
+    build_asset_manifest()
+
+
+if __name__ == "__main__":
+    main()
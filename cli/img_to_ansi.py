@@ -1,4 +1,5 @@
 import asyncio
+from itertools import groupby
 from pathlib import Path
 
 from PIL import Image
@@ -6,7 +7,7 @@ from PIL import Image
 from cli.common import (
     get_input_paths,
     get_output_paths,
-    run_blocking_tasks_in_threads,
+    run_blocking_tasks_in_processes,
 )
 from cli.config import ANSI_HEADERS_DIR, HEADERS_DIR
 
@@ -14,40 +15,107 @@ if not ANSI_HEADERS_DIR.is_dir():
     ANSI_HEADERS_DIR.mkdir(parents=True)
 
 
-def img_to_ansi(input_path: Path, output_path: Path, width: int = 79) -> None:
+# Truecolor SGR sequences: foreground only, and foreground + background
+FG_TEMPLATE = "\033[38;2;{};{};{}m"
+FG_BG_TEMPLATE = "\033[38;2;{};{};{};48;2;{};{};{}m"
+RESET = "\033[0m"
+FULL_BLOCK = "█"
+UPPER_HALF_BLOCK = "▀"
+
+
+def _get_rows(img: Image.Image) -> list[list[tuple[int, int, int]]]:
+    """Split the whole RGB pixel buffer into rows of (r, g, b) tuples."""
+    buffer = img.tobytes()
+    stride = img.width * 3
+    rows = []
+    for offset in range(0, len(buffer), stride):
+        channels = iter(buffer[offset : offset + stride])
+        rows.append(list(zip(channels, channels, channels, strict=True)))
+    return rows
+
+
+def _encode_full_blocks(rows: list[list[tuple[int, int, int]]]) -> list[str]:
+    lines = []
+    for row in rows:
+        # Emit the color once per run of identical pixels.
+        parts = [
+            FG_TEMPLATE.format(*color) + FULL_BLOCK * sum(1 for _ in run)
+            for color, run in groupby(row)
+        ]
+        parts.append(RESET)
+        lines.append("".join(parts))
+    return lines
+
+
+def _encode_half_blocks(rows: list[list[tuple[int, int, int]]]) -> list[str]:
+    lines = []
+    for top, bottom in zip(rows[::2], rows[1::2], strict=False):
+        # The foreground paints the upper half and the background the lower one.
+        parts = [
+            FG_BG_TEMPLATE.format(*colors[0], *colors[1])
+            + UPPER_HALF_BLOCK * sum(1 for _ in run)
+            for colors, run in groupby(zip(top, bottom, strict=True))
+        ]
+        parts.append(RESET)
+        lines.append("".join(parts))
+    return lines
+
+
+def image_to_ansi_lines(
+    img: Image.Image,
+    width: int = 79,
+    half_blocks: bool = False,
+) -> list[str]:
+    """Encode a decoded image as lines of colored ANSI art.
+
+    Args:
+        img (Image.Image): Source image, in any mode.
+        width (int, optional): Target width in characters. Defaults to 79.
+        half_blocks (bool, optional): Use upper half blocks (▀) with foreground
+            and background colors, doubling the vertical resolution for the
+            same number of lines. Defaults to False.
+
+    Returns:
+        list[str]: One string per terminal line.
+    """
+    img = img.convert("RGB")
+    w, h = img.size
+    aspect = h / w
+    # Vertical correction factor to compensate for character height in terminals
+    height = int(width * aspect * 0.3)
+    if half_blocks:
+        img = img.resize((width, height * 2))
+        return _encode_half_blocks(_get_rows(img))
+    img = img.resize((width, height))
+    return _encode_full_blocks(_get_rows(img))
+
+
+def img_to_ansi(
+    input_path: Path,
+    output_path: Path,
+    width: int = 79,
+    half_blocks: bool = False,
+) -> None:
     """Convert an image to colored ANSI art and save it as text.
 
     Args:
         input_path (Path): Source image path.
         output_path (Path): Destination `.ansi` text file path.
         width (int, optional): Target width in characters. Defaults to 79.
-
-    Raises:
-        OSError: If pixel data cannot be accessed.
+        half_blocks (bool, optional): Use upper half blocks (▀) with foreground
+            and background colors, doubling the vertical resolution for the
+            same number of lines. Defaults to False.
 
     Returns:
         None
 
     Notes:
         Uses 24-bit ANSI (ESC[38;2;r;g;bm) with a full block (█) per pixel.
+        The color sequence is only emitted when it differs from the previous
+        character's color.
     """
-    img = Image.open(input_path).convert("RGB")
-    w, h = img.size
-    aspect = h / w
-    # Vertical correction factor to compensate for character height in terminals
-    img = img.resize((width, int(width * aspect * 0.3)))
-    pixels = img.load()
-    if pixels is None:
-        raise OSError("Error accessing pixel data.")
-    lines = []
-    for y in range(img.height):
-        line = ""
-        for x in range(img.width):
-            r, g, b = pixels[x, y]  # type: ignore
-            # Represent each pixel as a colored ANSI block
-            line += f"\033[38;2;{r};{g};{b}m█"
-        line += "\033[0m"  # Reset ANSI color at end of line
-        lines.append(line)
+    with Image.open(input_path) as img:
+        lines = image_to_ansi_lines(img, width, half_blocks)
     output_path.write_text("\n".join(lines))
 
 
@@ -59,9 +127,9 @@ async def main() -> None:
         get_output_paths(input_paths, ".ansi", ANSI_HEADERS_DIR),
         strict=False,
     )
-    # Offload CPU-bound conversions to threads for non-blocking async execution
+    # Offload CPU-bound conversions to worker processes
     tasks = [(img_to_ansi, io_paths) for io_paths in ansi_io_paths]
-    await run_blocking_tasks_in_threads(tasks)
+    await run_blocking_tasks_in_processes(tasks)
 
 
 if __name__ == "__main__":